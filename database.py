@@ -42,6 +42,11 @@ else:
     # Local development — use an SQLite file in the project root.
     SQLALCHEMY_DATABASE_URL = "sqlite:///./database.db"
 
+# Number of server worker processes started by ``python main.py``; each one
+# opens its own pool. Defaults to 1 so a plain ``uvicorn main:app`` (a single
+# process) keeps the full pool.
+WORKERS = max(1, int(os.getenv("WORKERS", "1")))
+
 # ---------------------------------------------------------------------------
 # Engine creation
 # ---------------------------------------------------------------------------
@@ -61,13 +66,22 @@ else:
         separator = "&" if "?" in SQLALCHEMY_DATABASE_URL else "?"
         SQLALCHEMY_DATABASE_URL += f"{separator}sslmode=require"
 
+    # The connection budget defaults to (cores * 2) + 1 steady-state plus 20
+    # overflow, the usual starting point for PostgreSQL. Every worker process
+    # gets its own engine, so when WORKERS is set the budget is split across
+    # them to keep the total below the server's connection limit; override
+    # per worker with DB_POOL_SIZE / DB_MAX_OVERFLOW.
+    _default_pool_size = max(2, ((os.cpu_count() or 1) * 2 + 1) // WORKERS)
+    _default_max_overflow = max(2, 20 // WORKERS)
+
     engine = create_engine(
         SQLALCHEMY_DATABASE_URL,
+        pool_size=int(os.getenv("DB_POOL_SIZE", str(_default_pool_size))),  # Steady-state number of open connections
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", str(_default_max_overflow))),  # Extra connections allowed above pool_size under load
+        pool_timeout=10,      # Seconds to wait for a connection before raising an error
+        pool_recycle=1800,    # Recycle connections after 30 minutes to avoid server-side timeouts
         pool_pre_ping=True,   # Test each connection before using it (detects stale connections)
-        pool_recycle=300,     # Recycle connections after 5 minutes to avoid server-side timeouts
-        pool_size=5,          # Steady-state number of connections kept open
-        max_overflow=10,      # Additional connections allowed above pool_size under load
-        pool_timeout=30,      # Seconds to wait for a connection before raising an error
+        pool_use_lifo=True,   # Reuse the most recently returned connection so idle ones can time out
         echo=False,           # Set to True to log all generated SQL statements (debug only)
     )
 
@@ -77,7 +91,9 @@ else:
 
 # autocommit=False: transactions must be explicitly committed.
 # autoflush=False:  changes are not automatically flushed to the DB before queries.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False: handlers read attributes of just-committed rows to
+# build their responses; expiring them would force a re-SELECT per object.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 
 # ---------------------------------------------------------------------------
@@ -111,16 +127,30 @@ def init_db():
             if "template_id" not in existing_cols:
                 conn.execute(text("ALTER TABLE resumes ADD COLUMN template_id VARCHAR DEFAULT 'modern'"))
                 conn.commit()
+            if "batch_id" not in existing_cols:
+                conn.execute(text("ALTER TABLE resumes ADD COLUMN batch_id VARCHAR"))
+                conn.execute(text("CREATE INDEX IF NOT EXISTS ix_resumes_batch_id ON resumes (batch_id)"))
+                conn.commit()
+            if "summary_status" not in existing_cols:
+                conn.execute(text("ALTER TABLE resumes ADD COLUMN summary_status VARCHAR"))
+                conn.commit()
+            # Indexes added after the initial schema (create_all skips
+            # existing tables)
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_resumes_user_created ON resumes (user_id, created_at)"
+            ))
+            conn.commit()
     except Exception as e:
-        logger.warning(f"init_db failed (will retry on first request): {e}")
+        logger.warning("init_db failed (will retry on first request): %s", e)
 
 
 def get_db():
     """FastAPI dependency that yields a database session for a single request.
 
-    Yields a `Session` and ensures it is closed after the request completes,
-    even if an exception is raised. If the initial connection fails, one retry
-    is attempted before propagating the error.
+    Yields a `Session` and ensures it is closed after the request completes.
+    If the handler raises, any open transaction is rolled back first so the
+    connection goes back to the pool clean. Stale pooled connections are
+    detected by ``pool_pre_ping`` on the engine rather than a per-request probe.
 
     Example::
 
@@ -130,18 +160,9 @@ def get_db():
     """
     db = SessionLocal()
     try:
-        # Verify the connection is alive before handing it to the route handler.
-        db.execute("SELECT 1")
         yield db
-    except Exception as e:
-        # Connection failed — close the broken session and open a fresh one.
-        db.close()
-        logger = __import__('logging').getLogger(__name__)
-        logger.warning(f"Database connection failed, retrying: {e}")
-        db = SessionLocal()
-        try:
-            yield db
-        finally:
-            db.close()
+    except Exception:
+        db.rollback()
+        raise
     finally:
         db.close()
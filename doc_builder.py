@@ -1,3 +1,4 @@
+import copy
 import logging
 from docx import Document
 from docx.shared import Pt, RGBColor, Inches, Cm
@@ -13,6 +14,11 @@ import html
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Version of the .docx rendering code. main.py folds it into the content-
+# addressed filename of generated documents, so bump it whenever the builder
+# or a template changes and documents built by older code stop being reused.
+DOCX_BUILD_VERSION = "1"
+
 # ── Template Definitions ────────────────────────────────────────────────────
 #
 # layout values:
@@ -257,6 +263,32 @@ def _get_template(template_id: str) -> Dict:
     return TEMPLATES.get((template_id or "modern").lower(), TEMPLATES["modern"])
 
 
+# Parsing python-docx's bundled default template is a noticeable share of each
+# build, so one styled base document is kept per (font, size) pair and cloned.
+_BASE_DOCUMENTS: Dict[tuple, Document] = {}
+
+
+def _new_document(tmpl: Dict) -> Document:
+    """Return a blank Document whose Normal style uses the template's body font."""
+    key = (tmpl["body_font"], tmpl["body_size"])
+    base = _BASE_DOCUMENTS.get(key)
+    if base is None:
+        base = Document()
+        normal = base.styles['Normal']
+        normal.font.name = tmpl["body_font"]
+        normal.font.size = tmpl["body_size"]
+        _BASE_DOCUMENTS[key] = base
+    return copy.deepcopy(base)
+
+
+_CONTACT_FIELDS = ('phone', 'email', 'location', 'linkedin')
+
+
+def _contact_parts(contact: Dict) -> List[str]:
+    """Return the non-empty contact values in display order."""
+    return [v for v in map(contact.get, _CONTACT_FIELDS) if v]
+
+
 def _normalize_resume_data(data: Dict) -> Dict:
     """Return a copy of *data* with legacy and new schema field names reconciled.
 
@@ -482,17 +514,12 @@ def _build_word_layout_a(doc: Document, candidate_data: Dict, tmpl: Dict):
     nr.font.color.rgb = tmpl["heading_color"]
 
     # ── Contact line ─────────────────────────────────────────────────────────
-    contact_parts = []
-    if contact.get('phone'):    contact_parts.append(contact['phone'])
-    if contact.get('email'):    contact_parts.append(contact['email'])
-    if contact.get('location'): contact_parts.append(contact['location'])
-    if contact.get('linkedin'): contact_parts.append(contact['linkedin'])
+    contact_parts = _contact_parts(contact)
 
     contact_para = doc.add_paragraph()
     _set_para_spacing(contact_para, before=0, after=4)
     contact_para.alignment = tmpl["name_align"]
     cr = contact_para.add_run('  ·  '.join(contact_parts))
-    cr.font.name      = tmpl["body_font"]
     cr.font.size      = tmpl["contact_size"]
     cr.font.color.rgb = tmpl["muted_color"]
 
@@ -513,9 +540,7 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
         _section_heading(doc, 'Professional Summary', tmpl)
         p = doc.add_paragraph()
         _set_para_spacing(p, before=3, after=6, line=276)
-        r = p.add_run(summary)
-        r.font.name = tmpl["body_font"]
-        r.font.size = tmpl["body_size"]
+        p.add_run(summary)
 
     # ── Key Skills ───────────────────────────────────────────────────────────
     key_skills = candidate_data.get('key_skills', [])
@@ -523,28 +548,28 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
         _section_heading(doc, 'Key Skills', tmpl)
         p = doc.add_paragraph()
         _set_para_spacing(p, before=3, after=6)
-        r = p.add_run('  ·  '.join(str(s) for s in key_skills))
-        r.font.name = tmpl["body_font"]
-        r.font.size = tmpl["body_size"]
+        p.add_run('  ·  '.join(str(s) for s in key_skills))
 
     # ── Work Experience ──────────────────────────────────────────────────────
     experience = candidate_data.get('experience', [])
     if experience:
         _section_heading(doc, 'Work Experience', tmpl)
         for i, exp in enumerate(experience):
+            title       = exp.get('title', '')
+            dates       = exp.get('dates', '')
+            company     = exp.get('company', '')
+            location    = exp.get('location', '')
+            bullets     = exp.get('bullets', [])
+            description = exp.get('description', '').strip()
+
             job_para = doc.add_paragraph()
             _set_para_spacing(job_para, before=4, after=0)
-            tr = job_para.add_run(exp.get('title', ''))
-            tr.font.name      = tmpl["body_font"]
-            tr.font.size      = tmpl["body_size"]
+            tr = job_para.add_run(title)
             tr.font.bold      = True
             tr.font.color.rgb = tmpl["heading_color"]
 
-            dates = exp.get('dates', '')
             if dates:
                 tab_run = job_para.add_run('\t' + dates)
-                tab_run.font.name      = tmpl["body_font"]
-                tab_run.font.size      = tmpl["body_size"]
                 tab_run.font.bold      = False
                 tab_run.font.color.rgb = tmpl["muted_color"]
                 pPr  = job_para._p.get_or_add_pPr()
@@ -555,21 +580,14 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
                 tabs.append(tab)
                 pPr.append(tabs)
 
-            company  = exp.get('company',  '')
-            location = exp.get('location', '')
             sub_parts = [p for p in [company, location] if p]
             if sub_parts:
                 sub_para = doc.add_paragraph()
                 _set_para_spacing(sub_para, before=0, after=1)
                 sr = sub_para.add_run('  |  '.join(sub_parts))
-                sr.font.name      = tmpl["body_font"]
-                sr.font.size      = tmpl["body_size"]
                 sr.font.italic    = True
                 sr.font.color.rgb = tmpl["muted_color"]
 
-            bullets     = exp.get('bullets', [])
-            description = exp.get('description', '').strip()
-
             if bullets:
                 for bullet in bullets:
                     bp = doc.add_paragraph(style='List Bullet')
@@ -579,15 +597,11 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
                     ind.set(qn('w:left'),    '360')
                     ind.set(qn('w:hanging'), '180')
                     pPr.append(ind)
-                    br = bp.add_run(str(bullet))
-                    br.font.name = tmpl["body_font"]
-                    br.font.size = tmpl["body_size"]
+                    bp.add_run(str(bullet))
             elif description:
                 dp = doc.add_paragraph()
                 _set_para_spacing(dp, before=1, after=1, line=276)
-                dr = dp.add_run(description)
-                dr.font.name = tmpl["body_font"]
-                dr.font.size = tmpl["body_size"]
+                dp.add_run(description)
 
             if i < len(experience) - 1:
                 sp = doc.add_paragraph()
@@ -606,14 +620,10 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
             edu_para = doc.add_paragraph()
             _set_para_spacing(edu_para, before=4, after=0)
             dr = edu_para.add_run(deg_text)
-            dr.font.name      = tmpl["body_font"]
-            dr.font.size      = tmpl["body_size"]
             dr.font.bold      = True
             dr.font.color.rgb = tmpl["heading_color"]
             if grad:
                 tab_run = edu_para.add_run('\t' + grad)
-                tab_run.font.name      = tmpl["body_font"]
-                tab_run.font.size      = tmpl["body_size"]
                 tab_run.font.bold      = False
                 tab_run.font.color.rgb = tmpl["muted_color"]
                 pPr    = edu_para._p.get_or_add_pPr()
@@ -629,8 +639,6 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
                 ip = doc.add_paragraph()
                 _set_para_spacing(ip, before=0, after=4)
                 ir = ip.add_run(inst)
-                ir.font.name      = tmpl["body_font"]
-                ir.font.size      = tmpl["body_size"]
                 ir.font.italic    = True
                 ir.font.color.rgb = tmpl["muted_color"]
 
@@ -641,9 +649,7 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
         for cert in certs:
             cp = doc.add_paragraph(style='List Bullet')
             _set_para_spacing(cp, before=1, after=1)
-            cr = cp.add_run(str(cert))
-            cr.font.name = tmpl["body_font"]
-            cr.font.size = tmpl["body_size"]
+            cp.add_run(str(cert))
 
     # ── Awards ───────────────────────────────────────────────────────────────
     awards = candidate_data.get('awards', [])
@@ -652,9 +658,7 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
         for award in awards:
             ap = doc.add_paragraph(style='List Bullet')
             _set_para_spacing(ap, before=1, after=1)
-            ar = ap.add_run(str(award))
-            ar.font.name = tmpl["body_font"]
-            ar.font.size = tmpl["body_size"]
+            ap.add_run(str(award))
 
     # ── Technical Skills ─────────────────────────────────────────────────────
     tech_skills = candidate_data.get('technical_skills', [])
@@ -665,15 +669,11 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
             for line in ts_lines:
                 p = doc.add_paragraph()
                 _set_para_spacing(p, before=2, after=2)
-                r = p.add_run(line)
-                r.font.name = tmpl["body_font"]
-                r.font.size = tmpl["body_size"]
+                p.add_run(line)
         else:
             p = doc.add_paragraph()
             _set_para_spacing(p, before=3, after=6)
-            r = p.add_run('  ·  '.join(ts_lines))
-            r.font.name = tmpl["body_font"]
-            r.font.size = tmpl["body_size"]
+            p.add_run('  ·  '.join(ts_lines))
 
     # ── Additional Information ────────────────────────────────────────────────
     additional_info = [i for i in candidate_data.get('additional_information', []) if i]
@@ -682,9 +682,7 @@ def _add_body_sections_a(doc: Document, candidate_data: Dict, tmpl: Dict):
         for item in additional_info:
             p = doc.add_paragraph()
             _set_para_spacing(p, before=1, after=1)
-            r = p.add_run(str(item))
-            r.font.name = tmpl["body_font"]
-            r.font.size = tmpl["body_size"]
+            p.add_run(str(item))
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -726,7 +724,6 @@ def _sb_text(cell, text: str, tmpl: Dict, italic: bool = False,
     _set_para_spacing(p, before=before, after=after)
     _set_para_indent(p, _SB_PAD_L, _SB_PAD_R)
     r = p.add_run(text)
-    r.font.name      = tmpl["body_font"]
     r.font.size      = font_size or Pt(9.5)
     r.font.italic    = italic
     r.font.color.rgb = tmpl["docx_sidebar_text_rgb"]
@@ -832,10 +829,8 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
 
     # CONTACT
     _sb_heading(sb, 'Contact', tmpl)
-    for item in [contact.get('phone'), contact.get('email'),
-                 contact.get('location'), contact.get('linkedin')]:
-        if item:
-            _sb_text(sb, item, tmpl)
+    for item in _contact_parts(contact):
+        _sb_text(sb, item, tmpl)
 
     # KEY SKILLS
     key_skills = candidate_data.get('key_skills', [])
@@ -851,12 +846,14 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
         for edu in education:
             degree   = edu.get('degree', '')
             field    = edu.get('field',  '')
+            inst     = edu.get('institution')
+            grad     = edu.get('graduation_year')
             deg_text = f"{degree}{' — ' + field if field else ''}"
             _sb_text(sb, deg_text, tmpl, font_size=Pt(9))
-            if edu.get('institution'):
-                _sb_text(sb, edu['institution'], tmpl, italic=True, font_size=Pt(8.5))
-            if edu.get('graduation_year'):
-                _sb_text(sb, edu['graduation_year'], tmpl, font_size=Pt(8.5))
+            if inst:
+                _sb_text(sb, inst, tmpl, italic=True, font_size=Pt(8.5))
+            if grad:
+                _sb_text(sb, grad, tmpl, font_size=Pt(8.5))
 
     # CERTIFICATIONS
     certs = candidate_data.get('certifications', [])
@@ -880,30 +877,30 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
         p = mn.add_paragraph()
         _set_para_spacing(p, before=3, after=6, line=276)
         _set_para_indent(p, _MN_PAD_L, _MN_PAD_R)
-        r = p.add_run(summary)
-        r.font.name = tmpl["body_font"]
-        r.font.size = tmpl["body_size"]
+        p.add_run(summary)
 
     # WORK EXPERIENCE
     experience = candidate_data.get('experience', [])
     if experience:
         _mn_heading(mn, 'Work Experience', tmpl)
         for i, exp in enumerate(experience):
+            title       = exp.get('title', '')
+            dates       = exp.get('dates', '')
+            company     = exp.get('company', '')
+            location    = exp.get('location', '')
+            bullets     = exp.get('bullets', [])
+            description = exp.get('description', '').strip()
+
             # Job title + right-aligned dates
             jp = mn.add_paragraph()
             _set_para_spacing(jp, before=4, after=0)
             _set_para_indent(jp, _MN_PAD_L, _MN_PAD_R)
-            tr = jp.add_run(exp.get('title', ''))
-            tr.font.name      = tmpl["body_font"]
-            tr.font.size      = tmpl["body_size"]
+            tr = jp.add_run(title)
             tr.font.bold      = True
             tr.font.color.rgb = tmpl["heading_color"]
 
-            dates = exp.get('dates', '')
             if dates:
                 tab_run = jp.add_run('\t' + dates)
-                tab_run.font.name      = tmpl["body_font"]
-                tab_run.font.size      = tmpl["body_size"]
                 tab_run.font.bold      = False
                 tab_run.font.color.rgb = tmpl["muted_color"]
                 pPr  = jp._p.get_or_add_pPr()
@@ -914,22 +911,15 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
                 tabs.append(tab)
                 pPr.append(tabs)
 
-            company  = exp.get('company',  '')
-            location = exp.get('location', '')
             sub_parts = [x for x in [company, location] if x]
             if sub_parts:
                 sub = mn.add_paragraph()
                 _set_para_spacing(sub, before=0, after=1)
                 _set_para_indent(sub, _MN_PAD_L, _MN_PAD_R)
                 sr = sub.add_run('  |  '.join(sub_parts))
-                sr.font.name      = tmpl["body_font"]
-                sr.font.size      = tmpl["body_size"]
                 sr.font.italic    = True
                 sr.font.color.rgb = tmpl["muted_color"]
 
-            bullets     = exp.get('bullets', [])
-            description = exp.get('description', '').strip()
-
             if bullets:
                 for bullet in bullets:
                     bp = mn.add_paragraph()
@@ -939,16 +929,12 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
                     ind = OxmlElement('w:ind')
                     ind.set(qn('w:hanging'), '200')
                     pPr.append(ind)
-                    br = bp.add_run('•  ' + str(bullet))
-                    br.font.name = tmpl["body_font"]
-                    br.font.size = tmpl["body_size"]
+                    bp.add_run('•  ' + str(bullet))
             elif description:
                 dp = mn.add_paragraph()
                 _set_para_spacing(dp, before=1, after=1, line=276)
                 _set_para_indent(dp, _MN_PAD_L, _MN_PAD_R)
-                dr = dp.add_run(description)
-                dr.font.name = tmpl["body_font"]
-                dr.font.size = tmpl["body_size"]
+                dp.add_run(description)
 
             if i < len(experience) - 1:
                 gap = mn.add_paragraph()
@@ -962,9 +948,7 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
             ap = mn.add_paragraph()
             _set_para_spacing(ap, before=1, after=1)
             _set_para_indent(ap, _MN_PAD_L + 0.35, _MN_PAD_R)
-            ar = ap.add_run('•  ' + str(award))
-            ar.font.name = tmpl["body_font"]
-            ar.font.size = tmpl["body_size"]
+            ap.add_run('•  ' + str(award))
 
     # TECHNICAL SKILLS
     tech_skills = candidate_data.get('technical_skills', [])
@@ -976,16 +960,12 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
                 p = mn.add_paragraph()
                 _set_para_spacing(p, before=2, after=2)
                 _set_para_indent(p, _MN_PAD_L, _MN_PAD_R)
-                r = p.add_run(line)
-                r.font.name = tmpl["body_font"]
-                r.font.size = tmpl["body_size"]
+                p.add_run(line)
         else:
             p = mn.add_paragraph()
             _set_para_spacing(p, before=3, after=6)
             _set_para_indent(p, _MN_PAD_L, _MN_PAD_R)
-            r = p.add_run('  ·  '.join(ts_lines))
-            r.font.name = tmpl["body_font"]
-            r.font.size = tmpl["body_size"]
+            p.add_run('  ·  '.join(ts_lines))
 
     # ADDITIONAL INFORMATION
     additional_info = [i for i in candidate_data.get('additional_information', []) if i]
@@ -995,9 +975,7 @@ def _build_word_layout_b(doc: Document, candidate_data: Dict, tmpl: Dict):
             p = mn.add_paragraph()
             _set_para_spacing(p, before=1, after=1)
             _set_para_indent(p, _MN_PAD_L, _MN_PAD_R)
-            r = p.add_run(str(item))
-            r.font.name = tmpl["body_font"]
-            r.font.size = tmpl["body_size"]
+            p.add_run(str(item))
 
     # Bottom spacer
     gap = mn.add_paragraph()
@@ -1017,11 +995,7 @@ def _build_word_layout_c(doc: Document, candidate_data: Dict, tmpl: Dict):
     _set_doc_margins(doc)
 
     contact: Dict = candidate_data.get('contact', {})
-    contact_parts = []
-    if contact.get('phone'):    contact_parts.append(contact['phone'])
-    if contact.get('email'):    contact_parts.append(contact['email'])
-    if contact.get('location'): contact_parts.append(contact['location'])
-    if contact.get('linkedin'): contact_parts.append(contact['linkedin'])
+    contact_parts = _contact_parts(contact)
 
     header_hex  = tmpl["docx_header_bg_hex"]
     header_rgb  = tmpl["docx_header_text_rgb"]
@@ -1041,7 +1015,6 @@ def _build_word_layout_c(doc: Document, candidate_data: Dict, tmpl: Dict):
     _set_para_spacing(contact_para, before=0, after=14)
     _set_paragraph_shading(contact_para, header_hex)
     cr = contact_para.add_run('  ·  '.join(contact_parts))
-    cr.font.name      = tmpl["body_font"]
     cr.font.size      = tmpl["contact_size"]
     cr.font.color.rgb = header_rgb
 
@@ -1662,19 +1635,23 @@ class ResumeBuilder:
 
     def build_resume_text(self) -> str:
         """Plain-text fallback."""
-        resume = f"{self.resume_data.get('name', '')}\n"
+        lines = [self.resume_data.get('name', '')]
         contact = self.resume_data.get('contact_info', {})
         if isinstance(contact, dict):
-            resume += f"{contact.get('email', '')} | {contact.get('phone', '')} | {contact.get('location', '')}\n\n"
-        resume += 'WORK EXPERIENCE\n'
-        for exp in self.resume_data.get('experience', []):
-            if isinstance(exp, dict):
-                resume += f"  {exp.get('title', '')} at {exp.get('company', '')} ({exp.get('dates', '')})\n"
-        resume += '\nEDUCATION\n'
-        for edu in self.resume_data.get('education', []):
-            if isinstance(edu, dict):
-                resume += f"  {edu.get('degree', '')} from {edu.get('institution', '')}\n"
-        return resume
+            lines.append(f"{contact.get('email', '')} | {contact.get('phone', '')} | {contact.get('location', '')}")
+            lines.append('')
+        lines.append('WORK EXPERIENCE')
+        lines.extend(
+            f"  {exp.get('title', '')} at {exp.get('company', '')} ({exp.get('dates', '')})"
+            for exp in self.resume_data.get('experience', []) if isinstance(exp, dict)
+        )
+        lines.append('')
+        lines.append('EDUCATION')
+        lines.extend(
+            f"  {edu.get('degree', '')} from {edu.get('institution', '')}"
+            for edu in self.resume_data.get('education', []) if isinstance(edu, dict)
+        )
+        return '\n'.join(lines) + '\n'
 
     # ── Main Word document builder ───────────────────────────────────────────
     def build_word_document(self, output_path: str, candidate_data: Dict,
@@ -1692,10 +1669,7 @@ class ResumeBuilder:
         tmpl   = _get_template(template_id)
         layout = tmpl.get("layout", "A")
 
-        doc = Document()
-        normal = doc.styles['Normal']
-        normal.font.name = tmpl["body_font"]
-        normal.font.size = tmpl["body_size"]
+        doc = _new_document(tmpl)
 
         if layout == "B":
             _build_word_layout_b(doc, candidate_data, tmpl)
@@ -1706,7 +1680,7 @@ class ResumeBuilder:
 
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         doc.save(output_path)
-        logger.info(f'Resume saved → {output_path}  (template: {template_id}, layout: {layout})')
+        logger.info('Resume saved → %s  (template: %s, layout: %s)', output_path, template_id, layout)
         return output_path
 
     # ── HTML preview builder ─────────────────────────────────────────────────
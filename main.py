@@ -1,28 +1,43 @@
+import asyncio
+import hashlib
+import importlib.util
 import io
+import itertools
 import os
-from fastapi import FastAPI, Form, HTTPException, UploadFile, File, Depends, status, Body
+import secrets
+import time
+from contextlib import asynccontextmanager, suppress
+from functools import lru_cache
+from fastapi import BackgroundTasks, FastAPI, Form, HTTPException, UploadFile, File, Depends, status, Body, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr, Field
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, AuthenticationError, BadRequestError, DefaultAsyncHttpxClient, RateLimitError
 from dotenv import load_dotenv
 import json
 import logging
-from typing import List, Optional
+import orjson
+from typing import Dict, List, Optional
 from pathlib import Path
 from datetime import datetime
+from sqlalchemy import delete, exists, func, insert, select
 from sqlalchemy.orm import Session
-from database import get_db, init_db
+from database import WORKERS, SessionLocal, get_db, init_db
 from models import User, Resume
-from doc_builder import ResumeBuilder, TEMPLATE_LIST, DUMMY_CANDIDATE
-from prompts import SYSTEM_PROMPT_DRAFT, SYSTEM_PROMPT_GENERATE, create_resume_prompt, build_generate_prompt
+from doc_builder import ResumeBuilder, TEMPLATE_LIST, DUMMY_CANDIDATE, DOCX_BUILD_VERSION
+from prompts import (
+    SYSTEM_PROMPT_GENERATE, SYSTEM_PROMPT_DRAFT, SYSTEM_MESSAGE_DRAFT, SYSTEM_MESSAGE_GENERATE, RESPONSE_FORMAT_GENERATE,
+    PROMPT_CACHE_KEY_GENERATE, PROMPT_CACHE_KEY_DRAFT,
+    create_resume_prompt, build_generate_prompt, build_edit_prompt, structured_output_to_resume,
+)
 from utils import (
-    sanitize_filename, validate_file_extension, get_max_prompts_for_tier,
-    handle_database_error, standardize_response, validate_user_id,
+    content_matches_extension, is_safe_filename, slugify_filename_part, validate_file_extension, get_file_extension, get_max_prompts_for_tier,
+    handle_database_error, standardize_response, validate_user_id, needs_enhancement, TTLCache, ORJSONResponse, BufferedFileResponse,
     MAX_FILES, MAX_FILE_SIZE, ALLOWED_EXTENSIONS, MAX_PROMPTS_GUEST
 )
-import uuid
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -34,23 +49,211 @@ load_dotenv()
 # Only create the OpenAI client if a real API key is set (not the placeholder)
 _raw_openai_key = os.getenv("OPENAI_API_KEY", "")
 _openai_key_is_real = bool(_raw_openai_key) and not _raw_openai_key.startswith("your_")
-openai_client = OpenAI(api_key=_raw_openai_key) if _openai_key_is_real else None
+OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+OPENAI_TIMEOUT = 120  # Seconds to wait for a single chat completion
+
+# One pooled HTTP client per worker: keep-alive connections to the API are
+# reused across requests instead of paying a TLS handshake per completion,
+# and idle ones are kept long enough to survive gaps between bursts. HTTP/2
+# (multiplexing concurrent completions over one connection) needs the h2
+# package from httpx[http2]; without it the client stays on HTTP/1.1.
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+openai_client = AsyncOpenAI(
+    api_key=_raw_openai_key,
+    # create_chat_completion owns 429 backoff; SDK retries would multiply it
+    max_retries=0,
+    timeout=httpx.Timeout(OPENAI_TIMEOUT, connect=5.0, write=10.0, pool=5.0),
+    http_client=DefaultAsyncHttpxClient(
+        http2=_HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=50, keepalive_expiry=90),
+    ),
+) if _openai_key_is_real else None
 if not _openai_key_is_real:
     logger.warning("OPENAI_API_KEY is not configured — AI generation will be unavailable")
 
-OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+# Model used by the legacy wizard's summary enhancement
+SUMMARY_MODEL = "gpt-3.5-turbo"
+
+# Enhanced summaries keyed by a BLAKE2b digest of the model, system prompt and
+# whitespace-normalised user prompt, so a candidate resubmitting the same (or
+# only re-spaced) input gets the previous answer back without a round trip.
+_summary_cache = TTLCache(maxsize=1024, ttl=24 * 3600)
+
+# Raw resume JSON from /api/generate keyed by a BLAKE2b digest of the exact
+# model + prompts, so a retry with identical documents skips the AI call.
+_generate_cache = TTLCache(maxsize=256, ttl=24 * 3600)
+
+
+def _completion_cache_key(model: str, system_prompt: str, user_prompt: str) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in (model, system_prompt, user_prompt):
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# Completions currently awaiting OpenAI, keyed like the caches above. A burst of
+# identical requests that all miss the cache then shares a single API call.
+_inflight_completions: Dict[str, asyncio.Task] = {}
+
+
+async def _single_flight(key: str, fn, *args):
+    """Await ``fn(*args)``, joining an identical call already in flight for *key*.
+
+    The shared task is shielded so one caller disconnecting does not cancel the
+    call for everyone else; exceptions reach every waiter.
+    """
+    task = _inflight_completions.get(key)
+    if task is None:
+        task = asyncio.ensure_future(fn(*args))
+        _inflight_completions[key] = task
+        task.add_done_callback(lambda _: _inflight_completions.pop(key, None))
+    return await asyncio.shield(task)
+
+
+async def _completion_content(request: dict) -> str:
+    response = await create_chat_completion(**request)
+    return response.choices[0].message.content
+
+# Cap in-flight OpenAI requests per worker so bursts queue locally instead of
+# stampeding the API (and its rate limits).
+_openai_semaphore = asyncio.Semaphore(int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")))
+
+
+# Extra attempts after a 429, with exponential backoff (1s, 2s, 4s, ...)
+OPENAI_RATE_LIMIT_RETRIES = int(os.getenv("OPENAI_RATE_LIMIT_RETRIES", "3"))
+OPENAI_RETRY_BASE_DELAY = 1.0
+
+
+# Models that rejected a json_schema ``response_format`` (no structured-output
+# support); their later calls go straight to plain JSON mode.
+_models_without_json_schema: set = set()
+
+
+def _with_supported_response_format(kwargs: dict) -> dict:
+    """Swap a json_schema ``response_format`` for JSON mode on models known to reject it."""
+    response_format = kwargs.get("response_format") or {}
+    if response_format.get("type") == "json_schema" and kwargs.get("model") in _models_without_json_schema:
+        return {**kwargs, "response_format": {"type": "json_object"}}
+    return kwargs
+
+
+def _rejected_json_schema(kwargs: dict, exc: BadRequestError) -> bool:
+    """Whether *exc* is the model refusing the json_schema ``response_format`` in *kwargs*.
+
+    The model is remembered so :func:`_with_supported_response_format` downgrades
+    its later calls without another failed request.
+    """
+    response_format = kwargs.get("response_format") or {}
+    if response_format.get("type") != "json_schema":
+        return False
+    if getattr(exc, "param", None) != "response_format" and "response_format" not in str(exc):
+        return False
+    logger.warning("Model %s does not support structured outputs; using JSON mode", kwargs.get("model"))
+    _models_without_json_schema.add(kwargs.get("model"))
+    return True
+
+
+async def create_chat_completion(**kwargs):
+    """Await a chat completion on the shared async client.
+
+    The call yields to the event loop while waiting on the network, is bounded
+    by the per-worker concurrency limit, and raises ``asyncio.TimeoutError``
+    after ``OPENAI_TIMEOUT`` seconds. A ``RateLimitError`` is retried with
+    exponential backoff (outside the concurrency slot) before being re-raised.
+    A model that rejects a json_schema ``response_format`` is retried once in
+    JSON mode.
+    """
+    kwargs = _with_supported_response_format(kwargs)
+    try:
+        response = await _create_with_rate_limit_retries(kwargs)
+    except BadRequestError as exc:
+        if not _rejected_json_schema(kwargs, exc):
+            raise
+        response = await _create_with_rate_limit_retries(_with_supported_response_format(kwargs))
+    # Prompts lead with static text so repeat calls hit OpenAI's prefix cache
+    details = getattr(getattr(response, "usage", None), "prompt_tokens_details", None)
+    logger.debug("OpenAI prompt cache hit: %s tokens", getattr(details, "cached_tokens", None))
+    return response
+
+
+async def _create_with_rate_limit_retries(kwargs: dict):
+    for attempt in range(OPENAI_RATE_LIMIT_RETRIES + 1):
+        try:
+            async with _openai_semaphore:
+                response = await asyncio.wait_for(
+                    openai_client.chat.completions.create(**kwargs),
+                    timeout=OPENAI_TIMEOUT,
+                )
+            break
+        except RateLimitError:
+            if attempt == OPENAI_RATE_LIMIT_RETRIES:
+                raise
+            delay = OPENAI_RETRY_BASE_DELAY * 2 ** attempt
+            logger.warning("OpenAI rate limited, retrying in %.1fs (attempt %d)", delay, attempt + 1)
+            await asyncio.sleep(delay)
+    return response
+
+
+async def stream_chat_completion(**kwargs):
+    """Yield the content deltas of a streamed chat completion.
+
+    The concurrency slot is held until the stream is exhausted or closed;
+    ``OPENAI_TIMEOUT`` bounds the wait for the stream to open. As with
+    :func:`create_chat_completion`, a rejected json_schema ``response_format``
+    is retried once in JSON mode.
+    """
+    kwargs = _with_supported_response_format(kwargs)
+    async with _openai_semaphore:
+        try:
+            stream = await asyncio.wait_for(
+                openai_client.chat.completions.create(stream=True, **kwargs),
+                timeout=OPENAI_TIMEOUT,
+            )
+        except BadRequestError as exc:
+            if not _rejected_json_schema(kwargs, exc):
+                raise
+            stream = await asyncio.wait_for(
+                openai_client.chat.completions.create(stream=True, **_with_supported_response_format(kwargs)),
+                timeout=OPENAI_TIMEOUT,
+            )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+async def submit_batch_completion(body: dict, custom_id: str) -> str:
+    """Queue one chat completion on the OpenAI Batch API and return the batch id.
+
+    Batch requests are billed at half price and drawn from a separate rate
+    limit pool, at the cost of up to 24h latency. *custom_id* is echoed back
+    on the output line.
+    """
+    line = orjson.dumps({
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": "/v1/chat/completions",
+        "body": _with_supported_response_format(body),
+    })
+    batch_file = await openai_client.files.create(file=("batch.jsonl", line + b"\n"), purpose="batch")
+    batch = await openai_client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h",
+    )
+    return batch.id
 
 # Initialize database
 init_db()
 
 # Seed demo user on startup (idempotent – skipped if already present)
 def seed_demo_user():
-    import hashlib, json
+    import json
     from database import SessionLocal
     DEMO_EMAIL = "demo@example.com"
     db = SessionLocal()
     try:
-        if db.query(User).filter(User.email == DEMO_EMAIL).first():
+        if db.scalar(select(exists().where(User.email == DEMO_EMAIL))):
             return
         skills = json.dumps(["Python", "JavaScript", "React", "FastAPI",
                               "SQL", "REST APIs", "Git", "Docker"])
@@ -74,10 +277,9 @@ def seed_demo_user():
                    "experience, and delivering user-friendly products.")
         user = User(
             name="Alex Demo", email=DEMO_EMAIL,
-            password_hash=hashlib.sha256(b"demo1234").hexdigest(),
+            password_hash=User.hash_password("demo1234"),
             professional_summary=summary, skills=skills,
             experience=experience, education=education,
-            created_at=datetime.utcnow(), updated_at=datetime.utcnow(),
         )
         db.add(user)
         db.flush()
@@ -90,7 +292,6 @@ def seed_demo_user():
             professional_summary=summary, skills=skills,
             experience=experience, education=education,
             contact_info=contact_info,
-            created_at=datetime.utcnow(), updated_at=datetime.utcnow(),
         ))
         db.commit()
         logger.info("Demo user seeded: demo@example.com / demo1234")
@@ -105,11 +306,20 @@ seed_demo_user()
 # Security
 security = HTTPBearer()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    if openai_client is not None:
+        await openai_client.close()
+
+
 # FastAPI app initialization
 app = FastAPI(
     title="Resume Generator API",
     version="1.0.0",
-    description="Production-ready FastAPI application for generating professional resumes"
+    description="Production-ready FastAPI application for generating professional resumes",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -143,6 +353,11 @@ UPLOAD_DIR = Path(os.getenv("UPLOAD_DIR", "./uploads"))
 RESUMES_DIR = Path(os.getenv("RESUMES_DIR", "./resumes"))
 UPLOAD_DIR.mkdir(exist_ok=True)
 RESUMES_DIR.mkdir(exist_ok=True)
+# Resolved once; uploads join plain strings onto it instead of building Paths
+_UPLOAD_DIR_STR = str(UPLOAD_DIR.resolve())
+_RESUMES_DIR_RESOLVED = RESUMES_DIR.resolve()
+UPLOAD_CHUNK_SIZE = 64 * 1024  # Bytes read from an upload per iteration
+UPLOAD_WRITE_BUFFER = 512 * 1024  # Bytes gathered before each disk write
 # Note: MAX_FILES, MAX_FILE_SIZE, ALLOWED_EXTENSIONS are now in utils.py
 
 # Pydantic Models
@@ -199,6 +414,9 @@ class ResumeResponse(BaseModel):
     file_path: Optional[str] = None
 
 # Routes
+# Handlers that only do blocking work (sync SQLAlchemy queries, docx/HTML
+# rendering) are plain ``def``: FastAPI runs them in its threadpool, so they
+# never stall the event loop. Handlers that await OpenAI or uploads stay async.
 @app.get("/", tags=["Health"])
 async def root():
     """Root endpoint - Health check"""
@@ -218,7 +436,7 @@ async def health_check():
     }
 
 # Helper function to get current user (simplified - in production use JWT)
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
     # Simplified auth - in production, decode JWT token
     # For now, we'll use a simple token check
     user = db.query(User).filter(User.id == int(credentials.credentials)).first()
@@ -227,12 +445,11 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     return user
 
 @app.post("/api/auth/signup", tags=["Authentication"])
-async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
+def signup(user_data: UserSignup, db: Session = Depends(get_db)):
     """Register a new user"""
     try:
         # Check if user exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
-        if existing_user:
+        if db.scalar(select(exists().where(User.email == user_data.email))):
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Create new user
@@ -254,16 +471,22 @@ async def signup(user_data: UserSignup, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error creating user: {str(e)}")
+        logger.error("Error creating user: %s", e)
         raise HTTPException(status_code=500, detail=f"Error creating user: {str(e)}")
 
 @app.post("/api/auth/login", tags=["Authentication"])
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
+def login(login_data: UserLogin, db: Session = Depends(get_db)):
     """Login user"""
     try:
         user = db.query(User).filter(User.email == login_data.email).first()
         if not user or not user.verify_password(login_data.password):
             raise HTTPException(status_code=401, detail="Invalid email or password")
+
+        # Upgrade legacy SHA-256 (or older-cost scrypt) hashes now that the
+        # plain-text password is at hand.
+        if user.password_needs_rehash:
+            user.password_hash = User.hash_password(login_data.password)
+            db.commit()
         
         return standardize_response({
             "message": "Login successful",
@@ -273,7 +496,7 @@ async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error logging in: {str(e)}")
+        logger.error("Error logging in: %s", e)
         raise HTTPException(status_code=500, detail=f"Error logging in: {str(e)}")
 
 # ── PDF library availability check (done once at import time) ────────────────
@@ -290,24 +513,23 @@ except BaseException as _pdf_import_err:
 
 # ── Text extraction helpers ──────────────────────────────────────────────────
 
-async def extract_text_from_upload(file: UploadFile) -> str:
-    """Extract plain text from an uploaded file (TXT, DOCX, PDF)."""
-    content = await file.read()
-    name = (file.filename or "").lower()
+def _extract_text(content: bytes, filename: str, content_type: str) -> str:
+    """Extract plain text from the raw bytes of an uploaded file (TXT, DOCX, PDF)."""
+    name = filename.lower()
 
-    if name.endswith(".txt") or file.content_type in ("text/plain",):
+    if name.endswith(".txt") or content_type in ("text/plain",):
         return content.decode("utf-8", errors="ignore")
 
-    if name.endswith(".docx") or "wordprocessingml" in (file.content_type or ""):
+    if name.endswith(".docx") or "wordprocessingml" in content_type:
         try:
             from docx import Document as DocxDocument
             doc = DocxDocument(io.BytesIO(content))
             return "\n".join(p.text for p in doc.paragraphs if p.text.strip())
         except BaseException as exc:
-            logger.warning("DOCX extraction failed for %s: %s", file.filename, exc)
+            logger.warning("DOCX extraction failed for %s: %s", filename, exc)
             return content.decode("utf-8", errors="ignore")
 
-    if name.endswith(".pdf") or file.content_type == "application/pdf":
+    if name.endswith(".pdf") or content_type == "application/pdf":
         if _PYPDF_AVAILABLE and _PdfReader is not None:
             try:
                 reader = _PdfReader(io.BytesIO(content))
@@ -316,7 +538,7 @@ async def extract_text_from_upload(file: UploadFile) -> str:
                 if text.strip():
                     return text
             except BaseException as exc:
-                logger.warning("PDF extraction failed for %s: %s", file.filename, exc)
+                logger.warning("PDF extraction failed for %s: %s", filename, exc)
         # Fall back: PDFs sometimes contain embedded text readable as bytes
         return content.decode("utf-8", errors="ignore")
 
@@ -324,30 +546,36 @@ async def extract_text_from_upload(file: UploadFile) -> str:
     return content.decode("utf-8", errors="ignore")
 
 
-# ── Primary endpoint: generate from uploaded documents + job description ─────
+async def extract_text_from_upload(file: UploadFile) -> str:
+    """Extract plain text from an uploaded file (TXT, DOCX, PDF).
 
-@app.post("/api/generate", tags=["Resume Generation"])
-async def generate_from_documents(
-    files: List[UploadFile] = File(default=[]),
-    job_description: str = Form(default=""),
-    additional_info: str = Form(default=""),
-    template: str = Form(default="modern"),
-    user_id: Optional[int] = Form(default=None),  # Optional user ID for logged-in users
-    db: Session = Depends(get_db),
-):
+    Parsing runs in a worker thread, so several uploads can be extracted
+    concurrently without blocking the event loop. The body is read in chunks
+    and rejected with 413 as soon as it exceeds ``MAX_FILE_SIZE``, rather than
+    after an oversize file has been loaded into memory in full.
     """
-    Generate a tailored Australian resume from:
-    - Up to 5 uploaded supporting documents (old resumes, LinkedIn exports, etc.)
-    - An optional job description (omit for general-mode generation)
-    - Optional additional information (responses to criteria, specific examples, etc.)
+    chunks: List[bytes] = []
+    size = 0
+    while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > MAX_FILE_SIZE:
+            raise HTTPException(status_code=413, detail=f"File {file.filename} is too large")
+        chunks.append(chunk)
+    content = b"".join(chunks)
+    return await asyncio.to_thread(
+        _extract_text, content, file.filename or "", file.content_type or ""
+    )
 
-    When a job description is provided the resume is fully tailored to that role
-    (customisation mode). When omitted the AI generates a strong general-purpose
-    resume emphasising recency and seniority (general mode).
 
-    Returns a .docx download URL and an HTML preview.
+# ── Primary endpoint: generate from uploaded documents + job description ─────
+
+async def _prepare_generate_request(files: List[UploadFile], job_description: str,
+                                    additional_info: str):
+    """Validate a generate request and build its chat completion request.
+
+    Returns ``(completion_request, cache_key)``; raises ``HTTPException`` for
+    missing or unreadable files and when OpenAI is not configured.
     """
-    # Validate inputs first (before checking service availability)
     real_files = [f for f in files if f.filename]
     if not real_files:
         raise HTTPException(
@@ -370,12 +598,13 @@ async def generate_from_documents(
             ),
         )
 
-    # Extract text from every uploaded file
-    doc_parts: List[str] = []
-    for f in real_files:
-        text = await extract_text_from_upload(f)
-        if text.strip():
-            doc_parts.append(f"--- {f.filename} ---\n{text.strip()}")
+    # Extract text from every uploaded file concurrently (results keep upload order)
+    texts = await asyncio.gather(*(extract_text_from_upload(f) for f in real_files))
+    doc_parts: List[str] = [
+        f"--- {f.filename} ---\n{text.strip()}"
+        for f, text in zip(real_files, texts)
+        if text.strip()
+    ]
 
     if not doc_parts:
         raise HTTPException(
@@ -390,7 +619,7 @@ async def generate_from_documents(
     
     # Log additional info for debugging
     if additional_info_text:
-        logger.info(f"Additional information provided ({len(additional_info_text)} chars): {additional_info_text[:200]}...")
+        logger.info("Additional information provided (%d chars): %s...", len(additional_info_text), additional_info_text[:200])
     else:
         logger.info("No additional information provided")
     
@@ -402,58 +631,188 @@ async def generate_from_documents(
         generation_mode, len(user_prompt), bool(additional_info_text),
     )
 
-    # Call OpenAI to generate the resume JSON
+    completion_request = {
+        "model": OPENAI_MODEL,
+        "messages": [
+            SYSTEM_MESSAGE_GENERATE,
+            {"role": "user", "content": user_prompt},
+        ],
+        "temperature": 0.3,
+        "response_format": RESPONSE_FORMAT_GENERATE,
+        "prompt_cache_key": PROMPT_CACHE_KEY_GENERATE,
+    }
+    cache_key = _completion_cache_key(OPENAI_MODEL, SYSTEM_PROMPT_GENERATE, user_prompt)
+    return completion_request, cache_key
+
+
+def _generation_error(exc: Exception) -> HTTPException:
+    """Map a failed resume completion to the HTTP error reported to the client."""
+    if isinstance(exc, asyncio.TimeoutError):
+        logger.error("OpenAI generation timed out after %ss", OPENAI_TIMEOUT)
+        return HTTPException(status_code=504, detail="AI generation timed out. Please try again.")
+    if isinstance(exc, AuthenticationError):
+        logger.error("OpenAI rejected the API key: %s", exc)
+        return HTTPException(status_code=503, detail="AI service is not available. Please try again later.")
+    if isinstance(exc, RateLimitError):
+        logger.warning("OpenAI rate limit hit: %s", exc)
+        return HTTPException(status_code=429, detail="AI service is busy. Please try again shortly.")
+    logger.error("OpenAI generation failed: %s", exc)
+    return HTTPException(status_code=500, detail=f"AI generation failed: {exc}")
+
+
+@app.post("/api/generate", tags=["Resume Generation"])
+async def generate_from_documents(
+    files: List[UploadFile] = File(default=[]),
+    job_description: str = Form(default=""),
+    additional_info: str = Form(default=""),
+    template: str = Form(default="modern"),
+    user_id: Optional[int] = Form(default=None),  # Optional user ID for logged-in users
+    priority: str = Form(default="sync"),
+    db: Session = Depends(get_db),
+):
+    """
+    Generate a tailored Australian resume from:
+    - Up to 5 uploaded supporting documents (old resumes, LinkedIn exports, etc.)
+    - An optional job description (omit for general-mode generation)
+    - Optional additional information (responses to criteria, specific examples, etc.)
+
+    When a job description is provided the resume is fully tailored to that role
+    (customisation mode). When omitted the AI generates a strong general-purpose
+    resume emphasising recency and seniority (general mode).
+
+    Returns a .docx download URL and an HTML preview. With ``priority=batch``
+    the completion is queued on the OpenAI Batch API instead and the response
+    is a 202 with a ``batch_id`` to poll at ``/api/generate/batch/{batch_id}``.
+    """
+    # Validate inputs first (before checking service availability)
+    if priority not in ("sync", "batch"):
+        raise HTTPException(status_code=400, detail="priority must be 'sync' or 'batch'.")
+    completion_request, cache_key = await _prepare_generate_request(files, job_description, additional_info)
+
+    # Call OpenAI to generate the resume JSON (or reuse an identical earlier answer)
+    if priority == "batch" and _generate_cache.get(cache_key) is None:
+        return await _queue_batch_generation(completion_request, cache_key, template, user_id, db)
     try:
-        response = openai_client.chat.completions.create(
-            model=OPENAI_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT_GENERATE},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.3,
-            response_format={"type": "json_object"},
-            timeout=120,
-        )
-        resume_json_str = response.choices[0].message.content
-        resume_data = json.loads(resume_json_str)
-    except json.JSONDecodeError as exc:
-        logger.error("OpenAI returned non-JSON: %s", exc)
-        raise HTTPException(status_code=500, detail="AI returned an unexpected format. Please try again.")
+        resume_json_str = _generate_cache.get(cache_key)
+        if resume_json_str is None:
+            resume_json_str = await _single_flight(cache_key, _completion_content, completion_request)
+            resume_data = structured_output_to_resume(orjson.loads(resume_json_str))
+            _generate_cache.set(cache_key, resume_json_str)
+        else:
+            resume_data = structured_output_to_resume(orjson.loads(resume_json_str))
     except Exception as exc:
-        logger.error("OpenAI generation failed: %s", exc)
-        raise HTTPException(status_code=500, detail=f"AI generation failed: {exc}")
+        raise _generation_error(exc)
 
-    # Build the .docx
-    resume_builder = ResumeBuilder()
-    resume_filename = f"resume_{uuid.uuid4().hex[:10]}.docx"
-    # Sanitize filename (though UUID should be safe, this is defensive)
-    safe_filename = sanitize_filename(resume_filename)
-    resume_path = RESUMES_DIR / safe_filename
-    resume_builder.build_word_document(str(resume_path), resume_data, template_id=template)
+    return await _save_generated_resume(resume_data, template, user_id, db)
+
+
+def _sse(event: str, data: dict) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+@app.post("/api/generate/stream", tags=["Resume Generation"])
+async def generate_from_documents_stream(
+    files: List[UploadFile] = File(default=[]),
+    job_description: str = Form(default=""),
+    additional_info: str = Form(default=""),
+    template: str = Form(default="modern"),
+    user_id: Optional[int] = Form(default=None),
+):
+    """
+    Same as ``POST /api/generate``, but streamed as server-sent events.
+
+    Each ``delta`` event carries the next piece of the resume JSON as the
+    model writes it, so the client sees progress after the first token rather
+    than after the full completion. The stream ends with either a ``done``
+    event holding the usual generate response, or an ``error`` event with
+    ``status_code`` and ``detail``. Input errors are still plain HTTP errors.
+    """
+    completion_request, cache_key = await _prepare_generate_request(files, job_description, additional_info)
+
+    async def events():
+        try:
+            resume_json_str = _generate_cache.get(cache_key)
+            if resume_json_str is None:
+                parts: List[str] = []
+                async for delta in stream_chat_completion(**completion_request):
+                    parts.append(delta)
+                    yield _sse("delta", {"content": delta})
+                resume_json_str = "".join(parts)
+                resume_data = structured_output_to_resume(orjson.loads(resume_json_str))
+                _generate_cache.set(cache_key, resume_json_str)
+            else:
+                resume_data = structured_output_to_resume(orjson.loads(resume_json_str))
+                yield _sse("delta", {"content": resume_json_str})
+        except Exception as exc:
+            error = _generation_error(exc)
+            yield _sse("error", {"status_code": error.status_code, "detail": error.detail})
+            return
+
+        # The request-scoped session is not available once the handler has
+        # returned, so the stream saves through its own. The 200 has already
+        # gone out, so a failed render or save must also end in an error event.
+        db = SessionLocal()
+        try:
+            payload = await _save_generated_resume(resume_data, template, user_id, db)
+        except Exception as exc:
+            error = _generation_error(exc)
+            yield _sse("error", {"status_code": error.status_code, "detail": error.detail})
+            return
+        finally:
+            db.close()
+        yield _sse("done", payload)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    # Build the HTML preview
-    preview_html = resume_builder.build_html_preview(resume_data, template_id=template)
+
+def _owned_by(user_id: Optional[int]):
+    """Filter clause for resumes belonging to *user_id*, or to guests when it is None.
+
+    The same ownership rule ``_load_edit_target`` applies to AI edits.
+    """
+    return Resume.user_id == user_id if user_id else Resume.user_id.is_(None)
+
+
+def _insert_resume(db: Session, **values) -> int:
+    """Insert a resume row from column *values* and commit, returning its id.
+
+    A single ``INSERT ... RETURNING id`` hands back the key in the same round
+    trip, with no ORM instance to track or refresh afterwards. Blocking (plus,
+    on SQLite, an fsync); async handlers run it via ``asyncio.to_thread``.
+    """
+    resume_id = db.execute(insert(Resume).values(**values).returning(Resume.id)).scalar_one()
+    db.commit()
+    return resume_id
+
+
+async def _save_generated_resume(resume_data: dict, template: str,
+                                 user_id: Optional[int], db: Session) -> dict:
+    """Render AI-generated resume data, store it, and build the generate response."""
+    safe_filename, resume_path, preview_html = await asyncio.to_thread(
+        _render_generated_resume, resume_data, template
+    )
 
     # Always save the resume to the database (user_id=None for guests) so that
     # the resume_id can be used for AI-powered edits without requiring login.
     resume_id = None
     try:
-        resume_record = Resume(
+        resume_id = await asyncio.to_thread(
+            _insert_resume, db,
             user_id=user_id,  # NULL for guest resumes
             name=resume_data.get("name", "Untitled Resume"),
             file_path=str(resume_path),
-            contact_info=json.dumps(resume_data.get("contact", {})),
-            resume_data=json.dumps(resume_data),
+            contact_info=orjson.dumps(resume_data.get("contact", {})).decode(),
+            resume_data=orjson.dumps(resume_data).decode(),
             preview_html=preview_html,
             template_id=template,
         )
-        db.add(resume_record)
-        db.commit()
-        db.refresh(resume_record)
-        resume_id = resume_record.id
     except Exception as e:
-        logger.error(f"Error saving resume to database: {e}")
-        db.rollback()
+        logger.error("Error saving resume to database: %s", e)
+        await asyncio.to_thread(db.rollback)
 
     logger.info("Resume generated: %s (name: %s)", safe_filename, resume_data.get("name", "unknown"))
     # Return a flat response — NOT wrapped in standardize_response — so the
@@ -467,88 +826,374 @@ async def generate_from_documents(
     }
 
 
+def _build_docx_atomically(dest, resume_data: dict, template: str = "modern") -> None:
+    """Build a .docx under a temporary name in RESUMES_DIR, then move it onto *dest*.
+
+    A build or move that fails removes the partial temporary file rather than
+    leaving it in RESUMES_DIR.
+    """
+    tmp_path = RESUMES_DIR / f".{secrets.token_hex(8)}.docx"
+    try:
+        ResumeBuilder().build_word_document(str(tmp_path), resume_data, template_id=template)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+
+def _write_resume_docx(resume_data: dict, template: str) -> Path:
+    """Build the .docx for *resume_data* in *template*, reusing an identical earlier build.
+
+    Files are named by a BLAKE2b digest of the canonical resume JSON, the
+    template id and ``DOCX_BUILD_VERSION``, so rendering the same content again
+    (a template switched back, an edit that changed nothing) is a single
+    ``exists`` check, while a builder change produces fresh files. New builds
+    are written to a temporary name and moved into place atomically.
+
+    A ``delete_resume`` running concurrently can unlink a file between the
+    ``exists`` check here and the caller saving its row; that row's download
+    then 404s until the resume is rendered again, which rebuilds the file.
+    """
+    digest = hashlib.blake2b(
+        orjson.dumps(resume_data, option=orjson.OPT_SORT_KEYS)
+        + b"\0" + template.encode() + b"\0" + DOCX_BUILD_VERSION.encode(),
+        digest_size=10,
+    ).hexdigest()
+    resume_path = RESUMES_DIR / f"resume_{digest}.docx"
+    if not resume_path.exists():
+        _build_docx_atomically(resume_path, resume_data, template)
+    return resume_path
+
+
+def _render_generated_resume(resume_data: dict, template: str):
+    """Build the .docx and HTML preview for AI-generated resume data.
+
+    Blocking (python-docx XML assembly and a disk write); async callers run it
+    via ``asyncio.to_thread``. Returns ``(filename, path, preview_html)``.
+    """
+    resume_path = _write_resume_docx(resume_data, template)
+    preview_html = ResumeBuilder().build_html_preview(resume_data, template_id=template)
+    return resume_path.name, resume_path, preview_html
+
+
+async def _queue_batch_generation(completion_request: dict, cache_key: str, template: str,
+                                  user_id: Optional[int], db: Session):
+    """Submit a generate request to the Batch API and record a pending resume row.
+
+    The request's ``_generate_cache`` key travels as the batch ``custom_id`` so
+    the poll endpoint can cache the result for later identical sync requests.
+    """
+    try:
+        batch_id = await submit_batch_completion(completion_request, cache_key)
+    except AuthenticationError as exc:
+        logger.error("OpenAI rejected the API key: %s", exc)
+        raise HTTPException(status_code=503, detail="AI service is not available. Please try again later.")
+    except Exception as exc:
+        logger.error("OpenAI batch submission failed: %s", exc)
+        raise HTTPException(status_code=500, detail=f"AI batch submission failed: {exc}")
+
+    resume_id = await asyncio.to_thread(
+        _insert_resume, db,
+        user_id=user_id,
+        name="Pending resume",
+        template_id=template,
+        batch_id=batch_id,
+    )
+    logger.info("Resume generation queued: batch %s (resume %s)", batch_id, resume_id)
+    return ORJSONResponse(status_code=202, content={
+        "status": "queued",
+        "batch_id": batch_id,
+        "resume_id": resume_id,
+        "poll_url": f"/api/generate/batch/{batch_id}" + (f"?user_id={user_id}" if user_id else ""),
+    })
+
+
+@app.get("/api/generate/batch/{batch_id}", tags=["Resume Generation"])
+async def get_batch_generation(batch_id: str, user_id: Optional[int] = Query(default=None),
+                               db: Session = Depends(get_db)):
+    """Poll a ``priority=batch`` generation.
+
+    Returns 202 with the batch status while OpenAI is still working, and the
+    same payload as ``POST /api/generate`` once the resume has been built.
+    A batch queued with a ``user_id`` is only found with that ``user_id``.
+    """
+    resume = await asyncio.to_thread(
+        lambda: db.query(Resume).filter(Resume.batch_id == batch_id, _owned_by(user_id)).first()
+    )
+    if not resume:
+        raise HTTPException(status_code=404, detail="Batch not found")
+
+    if resume.resume_data is None:
+        if not openai_client:
+            raise HTTPException(status_code=503, detail="OpenAI API not configured")
+        batch = await openai_client.batches.retrieve(batch_id)
+        if batch.status in ("failed", "expired", "cancelled"):
+            raise HTTPException(status_code=502, detail=f"AI batch {batch.status}. Please generate again.")
+        if batch.status != "completed":
+            return ORJSONResponse(status_code=202, content={
+                "status": batch.status,
+                "batch_id": batch_id,
+                "resume_id": resume.id,
+            })
+        if not batch.output_file_id:
+            # The single request failed: its result went to the error file
+            error_text = None
+            if batch.error_file_id:
+                error_text = (await openai_client.files.content(batch.error_file_id)).text.strip()
+            logger.error("AI batch %s completed without output: %s", batch_id, error_text)
+            raise HTTPException(status_code=502, detail="AI batch request failed. Please generate again.")
+
+        output = await openai_client.files.content(batch.output_file_id)
+        try:
+            result = orjson.loads(output.text.splitlines()[0])
+            resume_json_str = result["response"]["body"]["choices"][0]["message"]["content"]
+            resume_data = structured_output_to_resume(orjson.loads(resume_json_str))
+        except (json.JSONDecodeError, KeyError, IndexError, TypeError) as exc:
+            logger.error("Unexpected batch output for %s: %s", batch_id, exc)
+            raise HTTPException(status_code=502, detail="AI returned an unexpected format. Please generate again.")
+        if result.get("custom_id"):
+            _generate_cache.set(result["custom_id"], resume_json_str)
+
+        _, resume_path, preview_html = await asyncio.to_thread(
+            _render_generated_resume, resume_data, resume.template_id or "modern"
+        )
+        resume.name = resume_data.get("name", "Untitled Resume")
+        resume.file_path = str(resume_path)
+        resume.contact_info = orjson.dumps(resume_data.get("contact", {})).decode()
+        resume.resume_data = orjson.dumps(resume_data).decode()
+        resume.preview_html = preview_html
+        await asyncio.to_thread(db.commit)
+        logger.info("Batch resume generated: %s (batch %s)", resume_path.name, batch_id)
+    else:
+        resume_data = orjson.loads(resume.resume_data)
+
+    filename = Path(resume.file_path).name
+    return {
+        "filename": filename,
+        "download_url": f"/api/resumes/download-file/{filename}",
+        "preview_html": resume.preview_html,
+        "data": resume_data,
+        "resume_id": resume.id,
+    }
+
+
 # ── Legacy wizard endpoint (kept for backward compatibility) ──────────────────
 
+async def _enhance_summary(candidate_dict: dict, fallback: str) -> str:
+    """Ask OpenAI for an enhanced summary, falling back to *fallback* on any failure.
+
+    A summary that already passes :func:`utils.needs_enhancement` is returned
+    as written without an API call.
+    """
+    if not openai_client:
+        return fallback
+    summary_text = candidate_dict.get('summary') or candidate_dict.get('professional_summary') or ""
+    if not needs_enhancement(summary_text):
+        logger.info("Summary enhancement skipped: input already polished (%d chars)", len(summary_text))
+        return summary_text
+    try:
+        prompt = create_resume_prompt(candidate_dict)
+        cache_key = _completion_cache_key(SUMMARY_MODEL, SYSTEM_PROMPT_DRAFT, " ".join(prompt.split()))
+        cached_summary = _summary_cache.get(cache_key)
+        if cached_summary is not None:
+            return cached_summary
+        enhanced_summary = await _single_flight(cache_key, _completion_content, {
+            "model": SUMMARY_MODEL,
+            "messages": [
+                SYSTEM_MESSAGE_DRAFT,
+                {"role": "user", "content": prompt}
+            ],
+            "max_tokens": 500,
+            "temperature": 0.7,
+            "prompt_cache_key": PROMPT_CACHE_KEY_DRAFT,
+        })
+        _summary_cache.set(cache_key, enhanced_summary)
+        return enhanced_summary
+    except Exception as e:
+        logger.warning("OpenAI enhancement failed: %s, using original summary", e)
+        return fallback
+
+
+def _candidate_skills(key_skills: List[str], technical_skills) -> list:
+    """Key skills followed by technical skills, as the flat list stored in ``skills``.
+
+    Built in one pass without an intermediate concatenation; the
+    ``{category: [skills]}`` form of ``technical_skills`` is flattened.
+    """
+    if isinstance(technical_skills, dict):
+        technical_skills = itertools.chain.from_iterable(
+            items if isinstance(items, list) else [items] for items in technical_skills.values()
+        )
+    return list(itertools.chain(key_skills, technical_skills or ()))
+
+
+def _build_candidate_resume(candidate: CandidateInput, candidate_dict: dict,
+                            enhanced_summary: str, db: Session,
+                            summary_pending: bool = False) -> dict:
+    """Build the .docx for a wizard candidate and save it for logged-in users.
+
+    With *summary_pending* the row is saved for guests too and marked
+    ``summary_status='pending'`` so a background enhancement can update it.
+    """
+    # Update candidate_dict with enhanced summary before building the document
+    candidate_dict['professional_summary'] = enhanced_summary
+
+    # Build Word document
+    resume_builder = ResumeBuilder()
+    resume_filename = f"resume_{secrets.token_hex(8)}_{slugify_filename_part(candidate.name)}.docx"
+    resume_path = RESUMES_DIR / resume_filename
+
+    resume_builder.build_word_document(str(resume_path), candidate_dict)
+
+    # Save to database if user_id provided (or a summary update will follow)
+    resume_id = None
+    if candidate.user_id or summary_pending:
+        resume_id = _insert_resume(
+            db,
+            user_id=candidate.user_id,
+            name=candidate.name,
+            file_path=str(resume_path),
+            professional_summary=enhanced_summary,
+            skills=orjson.dumps(_candidate_skills(candidate.key_skills, candidate.technical_skills)).decode(),
+            # Reuse the request's model_dump rather than walking the models again
+            experience=orjson.dumps(candidate_dict['experience']).decode(),
+            education=orjson.dumps(candidate_dict['education']).decode(),
+            contact_info=orjson.dumps(candidate_dict['contact']).decode(),
+            summary_status="pending" if summary_pending else None,
+        )
+
+    return {
+        "resume_id": resume_id,
+        "name": candidate.name,
+        "email": candidate.contact.email,
+        "file_path": str(resume_path),
+        "filename": resume_filename,
+        "download_url": f"/api/resumes/download-file/{resume_filename}",
+        "generated_at": datetime.utcnow().isoformat()
+    }
+
+
+def _store_enhanced_summary(resume_id: int, candidate_dict: dict, summary: str) -> None:
+    """Rebuild a wizard resume's .docx with *summary* in place and mark it ready.
+
+    The document keeps its path, so a download URL handed out before the
+    enhancement finished serves the enhanced version afterwards.
+    """
+    with SessionLocal() as db:
+        resume = db.get(Resume, resume_id)
+        if resume is None:
+            return  # Deleted while the enhancement was running
+        if summary != resume.professional_summary and resume.file_path:
+            candidate_dict['professional_summary'] = summary
+            _build_docx_atomically(resume.file_path, candidate_dict)
+        resume.professional_summary = summary
+        resume.summary_status = "ready"
+        db.commit()
+
+
+async def _enhance_and_store(resume_id: int, candidate_dict: dict, fallback: str) -> None:
+    """Background task for ``enhance=background``: enhance, then update the saved resume."""
+    summary = await _enhance_summary(candidate_dict, fallback)
+    try:
+        await asyncio.to_thread(_store_enhanced_summary, resume_id, candidate_dict, summary)
+    except Exception as e:
+        logger.error("Error storing enhanced summary for resume %s: %s", resume_id, e)
+
+
 @app.post("/api/generate-resume", tags=["Resume Generation"])
 async def generate_resume(
     candidate: CandidateInput,
+    background_tasks: BackgroundTasks,
+    enhance: str = Query(default="sync"),
     db: Session = Depends(get_db)
 ):
-    """Generate a professional resume from candidate information"""
+    """Generate a professional resume from candidate information.
+
+    With ``enhance=background`` the document is built from the submitted
+    summary and returned straight away; the AI-enhanced summary is applied
+    after the response and can be polled at ``/api/resumes/{id}/summary``.
+    """
+    if enhance not in ("sync", "background"):
+        raise HTTPException(status_code=400, detail="enhance must be 'sync' or 'background'.")
     try:
-        logger.info(f"Generating resume for {candidate.name}")
-        
-        # Get user_id from request body
-        user_id = candidate.user_id
-        
+        logger.info("Generating resume for %s", candidate.name)
+
         # Convert Pydantic model to dict (exclude user_id from dict)
         candidate_dict = candidate.model_dump(exclude={'user_id'})
 
-        # Optionally enhance with OpenAI (if API key is available)
-        enhanced_summary = candidate.professional_summary
-        if openai_client:
-            try:
-                prompt = create_resume_prompt(candidate_dict)
-                response = openai_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": SYSTEM_PROMPT_DRAFT},
-                        {"role": "user", "content": prompt}
-                    ],
-                    max_tokens=500,
-                    temperature=0.7
-                )
-                enhanced_summary = response.choices[0].message.content
-            except Exception as e:
-                logger.warning(f"OpenAI enhancement failed: {str(e)}, using original summary")
+        if enhance == "background":
+            data = await asyncio.to_thread(
+                _build_candidate_resume, candidate, candidate_dict,
+                candidate.professional_summary, db, summary_pending=True,
+            )
+            background_tasks.add_task(
+                _enhance_and_store, data["resume_id"], candidate_dict, candidate.professional_summary
+            )
+            data["summary_status"] = "pending"
+            data["summary_url"] = f"/api/resumes/{data['resume_id']}/summary"
+            if candidate.user_id:
+                data["summary_url"] += f"?user_id={candidate.user_id}"
+            return {
+                "status": "success",
+                "message": "Resume generated successfully",
+                "data": data,
+            }
 
-        # Update candidate_dict with enhanced summary before building the document
-        candidate_dict['professional_summary'] = enhanced_summary
+        # Optionally enhance with OpenAI (if API key is available)
+        enhanced_summary = await _enhance_summary(candidate_dict, candidate.professional_summary)
 
-        # Build Word document
-        resume_builder = ResumeBuilder()
-        resume_filename = f"resume_{uuid.uuid4().hex[:8]}_{candidate.name.replace(' ', '_')}.docx"
-        resume_path = RESUMES_DIR / resume_filename
-
-        resume_builder.build_word_document(str(resume_path), candidate_dict)
-
-        # Save to database if user_id provided
-        resume_id = None
-        if user_id:
-            resume_record = Resume(
-                user_id=user_id,
-                name=candidate.name,
-                file_path=str(resume_path),
-                professional_summary=enhanced_summary,
-                skills=json.dumps(candidate.key_skills + candidate.technical_skills),
-                experience=json.dumps([exp.model_dump() for exp in candidate.experience]),
-                education=json.dumps([edu.model_dump() for edu in candidate.education]),
-                contact_info=json.dumps(candidate.contact.model_dump())
-            )
-            db.add(resume_record)
-            db.commit()
-            db.refresh(resume_record)
-            resume_id = resume_record.id
-        
         return {
             "status": "success",
             "message": "Resume generated successfully",
-            "data": {
-                "resume_id": resume_id,
-                "name": candidate.name,
-                "email": candidate.contact.email,
-                "file_path": str(resume_path),
-                "filename": resume_filename,
-                "download_url": f"/api/resumes/download-file/{resume_filename}",
-                "generated_at": datetime.utcnow().isoformat()
-            }
+            "data": await asyncio.to_thread(
+                _build_candidate_resume, candidate, candidate_dict, enhanced_summary, db
+            ),
         }
     except Exception as e:
-        logger.error(f"Error generating resume: {str(e)}")
+        logger.error("Error generating resume: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating resume: {str(e)}")
 
+
+MAX_BULK_CANDIDATES = 20
+
+
+@app.post("/api/generate-resume/bulk", tags=["Resume Generation"])
+async def generate_resume_bulk(
+    candidates: List[CandidateInput] = Body(...),
+    db: Session = Depends(get_db)
+):
+    """Generate resumes for several candidates in one request.
+
+    Summary enhancements run concurrently — bounded by the per-worker OpenAI
+    concurrency limit and retried with backoff on rate limits — so the batch
+    takes roughly as long as its slowest completion rather than the sum.
+    """
+    if not candidates:
+        raise HTTPException(status_code=400, detail="Provide at least one candidate.")
+    if len(candidates) > MAX_BULK_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"Maximum {MAX_BULK_CANDIDATES} candidates per request.")
+
+    try:
+        logger.info("Generating %d resumes in bulk", len(candidates))
+        candidate_dicts = [c.model_dump(exclude={'user_id'}) for c in candidates]
+        summaries = await asyncio.gather(*(
+            _enhance_summary(d, c.professional_summary) for c, d in zip(candidates, candidate_dicts)
+        ))
+        results = [
+            await asyncio.to_thread(_build_candidate_resume, c, d, summary, db)
+            for c, d, summary in zip(candidates, candidate_dicts, summaries)
+        ]
+        return {
+            "status": "success",
+            "message": f"{len(results)} resumes generated successfully",
+            "data": results,
+        }
+    except Exception as e:
+        logger.error("Error generating resumes in bulk: %s", e)
+        raise HTTPException(status_code=500, detail=f"Error generating resumes: {str(e)}")
+
 @app.post("/api/preview-resume", tags=["Resume Generation"], response_class=HTMLResponse)
-async def preview_resume(candidate: CandidateInput):
+def preview_resume(candidate: CandidateInput):
     """
     Return an HTML preview of the resume that matches the exported .docx layout.
     The frontend embeds this in an iframe (srcdoc) so users see an exact document preview.
@@ -559,14 +1204,24 @@ async def preview_resume(candidate: CandidateInput):
         html_content = resume_builder.build_html_preview(candidate_dict)
         return HTMLResponse(content=html_content, status_code=200)
     except Exception as e:
-        logger.error(f"Error generating preview: {str(e)}")
+        logger.error("Error generating preview: %s", e)
         raise HTTPException(status_code=500, detail=f"Error generating preview: {str(e)}")
 
 
 @app.get("/api/resumes", tags=["Resume Management"])
-async def get_user_resumes(user_id: Optional[int] = None, db: Session = Depends(get_db)):
-    """Get all resumes for a user"""
-    import time
+def get_user_resumes(
+    user_id: Optional[int] = None,
+    skip: int = Query(default=0, ge=0),
+    limit: Optional[int] = Query(default=None, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
+    """Get a user's resumes, newest first, optionally paginated with ``skip``/``limit``.
+
+    The page and the total match count come back from a single query via a
+    ``count(*) OVER ()`` window, so paging never costs a second round trip.
+    Filtering and ordering are both served by ``ix_resumes_user_created``, and
+    only the listed columns are fetched — not the stored JSON and preview HTML.
+    """
     max_retries = 3
     retry_delay = 0.5
     
@@ -576,8 +1231,26 @@ async def get_user_resumes(user_id: Optional[int] = None, db: Session = Depends(
     
     for attempt in range(max_retries):
         try:
-            resumes = db.query(Resume).filter(Resume.user_id == user_id).all()
-            return standardize_response({
+            stmt = (
+                select(
+                    Resume.id, Resume.name, Resume.created_at, Resume.file_path, Resume.contact_info,
+                    func.count().over().label("total"),
+                )
+                .where(Resume.user_id == user_id)
+                .order_by(Resume.created_at.desc(), Resume.id.desc())
+                .offset(skip)
+                .limit(limit)
+            )
+            rows = db.execute(stmt).all()
+            if rows:
+                total = rows[0].total
+            elif skip:
+                # Page past the end: the window had no rows to report on
+                total = db.scalar(select(func.count()).select_from(Resume).where(Resume.user_id == user_id))
+            else:
+                total = 0
+            # Already JSON-native: hand straight to orjson, skipping jsonable_encoder
+            return ORJSONResponse(standardize_response({
                 "resumes": [
                     {
                         "id": r.id,
@@ -585,16 +1258,19 @@ async def get_user_resumes(user_id: Optional[int] = None, db: Session = Depends(
                         "created_at": r.created_at.isoformat() if r.created_at else None,
                         "file_path": r.file_path,
                         "contact_info": r.contact_info,
-                        "filename": Path(r.file_path).name if r.file_path else None,
+                        "filename": os.path.basename(r.file_path) if r.file_path else None,
                     }
-                    for r in resumes
-                ]
-            })
+                    for r in rows
+                ],
+                "total": total,
+                "skip": skip,
+                "limit": limit,
+            }))
         except Exception as e:
             error_str = str(e)
             if "SSL connection" in error_str or "closed unexpectedly" in error_str:
                 if attempt < max_retries - 1:
-                    logger.warning(f"SSL connection error (attempt {attempt + 1}/{max_retries}), retrying...")
+                    logger.warning("SSL connection error (attempt %s/%s), retrying...", attempt + 1, max_retries)
                     time.sleep(retry_delay * (attempt + 1))
                     db.rollback()
                     continue
@@ -605,69 +1281,126 @@ async def get_user_resumes(user_id: Optional[int] = None, db: Session = Depends(
     
     raise HTTPException(status_code=500, detail="Failed to fetch resumes after retries")
 
+@app.get("/api/resumes/{resume_id}/summary", tags=["Resume Management"])
+def get_resume_summary(resume_id: int, user_id: Optional[int] = Query(default=None), db: Session = Depends(get_db)):
+    """Poll the professional summary of a resume generated with ``enhance=background``.
+
+    A user's resume is only found with their ``user_id``; guest resumes without one.
+    """
+    row = db.execute(
+        select(Resume.professional_summary, Resume.summary_status)
+        .where(Resume.id == resume_id, _owned_by(user_id))
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return {
+        "resume_id": resume_id,
+        "status": row.summary_status or "ready",
+        "professional_summary": row.professional_summary,
+    }
+
+
+def _stat_or_404(file_path: Optional[str]) -> os.stat_result:
+    """Stat a stored resume file, raising 404 if it is missing.
+
+    The result is handed to ``FileResponse`` for its size/mtime headers, so a
+    download costs one ``stat`` instead of an ``exists()`` check plus another.
+    """
+    try:
+        if file_path:
+            return os.stat(file_path)
+    except FileNotFoundError:
+        pass
+    raise HTTPException(status_code=404, detail="Resume file not found")
+
+
 @app.get("/api/resumes/{resume_id}/download", tags=["Resume Management"])
-async def download_resume(resume_id: int, db: Session = Depends(get_db)):
+def download_resume(resume_id: int, db: Session = Depends(get_db)):
     """Download a resume file"""
     try:
-        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        # Only the two columns needed for the response, not the stored JSON
+        # and preview HTML.
+        resume = db.execute(
+            select(Resume.name, Resume.file_path).where(Resume.id == resume_id)
+        ).first()
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
         
-        if not resume.file_path or not Path(resume.file_path).exists():
-            raise HTTPException(status_code=404, detail="Resume file not found")
+        stat_result = _stat_or_404(resume.file_path)
         
-        return FileResponse(
+        return BufferedFileResponse(
             resume.file_path,
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename=f"{resume.name}_resume.docx"
+            filename=f"{resume.name}_resume.docx",
+            stat_result=stat_result,
         )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error downloading resume: {str(e)}")
+        logger.error("Error downloading resume: %s", e)
         raise HTTPException(status_code=500, detail=f"Error downloading resume: {str(e)}")
 
+def _is_in_resumes_dir(filename: str) -> bool:
+    """True if *filename* resolves (following symlinks) to a path inside RESUMES_DIR."""
+    return (RESUMES_DIR / filename).resolve().is_relative_to(_RESUMES_DIR_RESOLVED)
+
+
 @app.get("/api/resumes/download-file/{filename}", tags=["Resume Management"])
 async def download_resume_by_filename(filename: str):
     """Download a generated resume file directly by filename"""
     try:
-        # Sanitize filename to prevent directory traversal
-        safe_filename = sanitize_filename(filename)
-        file_path = RESUMES_DIR / safe_filename
-        
-        # Additional security: ensure file is within RESUMES_DIR
-        try:
-            file_path.resolve().relative_to(RESUMES_DIR.resolve())
-        except ValueError:
+        # Fast path: a name of [A-Za-z0-9._-] that doesn't start with '.' cannot
+        # traverse out of RESUMES_DIR, and the check costs no syscalls. Names
+        # saved by earlier versions (e.g. "resume_..._O'Brien.docx") may hold
+        # other characters; those must be a plain, non-hidden basename that
+        # still resolves inside RESUMES_DIR.
+        if not is_safe_filename(filename) and (
+            not filename
+            or filename.startswith(".")
+            or "\0" in filename
+            or os.path.basename(filename) != filename
+            or not await asyncio.to_thread(_is_in_resumes_dir, filename)
+        ):
             raise HTTPException(status_code=400, detail="Invalid file path")
-        
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="Resume file not found")
+        safe_filename = filename
+        file_path = RESUMES_DIR / safe_filename
 
-        return FileResponse(
+        stat_result = await asyncio.to_thread(_stat_or_404, str(file_path))
+
+        return BufferedFileResponse(
             str(file_path),
             media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            filename=safe_filename
+            filename=safe_filename,
+            stat_result=stat_result,
         )
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error downloading resume file: {str(e)}")
+        logger.error("Error downloading resume file: %s", e)
         raise HTTPException(status_code=500, detail="Error downloading resume file")
 
 @app.delete("/api/resumes/{resume_id}", tags=["Resume Management"])
-async def delete_resume(resume_id: int, db: Session = Depends(get_db)):
+def delete_resume(resume_id: int, db: Session = Depends(get_db)):
     """Delete a resume"""
     try:
-        resume = db.query(Resume).filter(Resume.id == resume_id).first()
-        if not resume:
+        # Fetch just the file path and delete with a single statement rather
+        # than loading the full row into the session first.
+        row = db.execute(select(Resume.file_path).where(Resume.id == resume_id)).first()
+        if row is None:
             raise HTTPException(status_code=404, detail="Resume not found")
         
-        # Delete file if exists
-        if resume.file_path and Path(resume.file_path).exists():
-            Path(resume.file_path).unlink()
+        # Delete the file unless another resume renders to the same
+        # content-addressed .docx. Not atomic with a concurrent generate that
+        # reuses the path (see _write_resume_docx): that row's file is rebuilt
+        # on its next render.
+        if row.file_path:
+            shared = db.scalar(select(exists().where(
+                Resume.file_path == row.file_path, Resume.id != resume_id
+            )))
+            if not shared:
+                Path(row.file_path).unlink(missing_ok=True)
         
-        db.delete(resume)
+        db.execute(delete(Resume).where(Resume.id == resume_id))
         db.commit()
         
         return {
@@ -677,50 +1410,96 @@ async def delete_resume(resume_id: int, db: Session = Depends(get_db)):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error deleting resume: {str(e)}")
+        logger.error("Error deleting resume: %s", e)
         raise HTTPException(status_code=500, detail=f"Error deleting resume: {str(e)}")
 
 @app.post("/api/upload-resume", tags=["File Operations"])
 async def upload_resume(file: UploadFile = File(...)):
     """Upload a resume file"""
     try:
-        file_ext = Path(file.filename).suffix.lower()
+        file_ext = get_file_extension(file.filename)
         if file_ext not in ALLOWED_EXTENSIONS:
             raise HTTPException(status_code=400, detail=f"File type {file_ext} not allowed")
         
-        file_content = await file.read()
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=413, detail="File too large")
-        
-        file_path = UPLOAD_DIR / file.filename
-        with open(file_path, "wb") as f:
-            f.write(file_content)
-        
-        logger.info(f"File uploaded successfully: {file.filename}")
+        # The extension is only the client's claim: check it against the
+        # file's leading bytes before anything is written.
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not content_matches_extension(chunk, file_ext):
+            raise HTTPException(status_code=415, detail=f"File content does not match type {file_ext}")
+
+        # Stream the upload to disk in chunks so it is never held in memory as a
+        # whole; oversize files are rejected as soon as the limit is crossed.
+        # Chunks are hashed as they arrive and the file is stored under its
+        # content digest, so re-uploading identical bytes keeps a single copy.
+        # The store is shared across users, so whether a copy already existed
+        # is only logged, never returned.
+        # Opening, writing, closing and renaming run in the threadpool so slow
+        # disks never stall the event loop (only error cleanup is inline); chunks are gathered into
+        # UPLOAD_WRITE_BUFFER-sized writes so that costs one threadpool hop
+        # per 512 KiB rather than per 64 KiB read.
+        tmp_path = os.path.join(_UPLOAD_DIR_STR, f".{secrets.token_hex(8)}.part")
+        digest = hashlib.blake2b(digest_size=16)
+        file_size = 0
+        pending = bytearray()
+        f = await run_in_threadpool(open, tmp_path, "wb", UPLOAD_WRITE_BUFFER)
+        try:
+            try:
+                while chunk:
+                    file_size += len(chunk)
+                    if file_size > MAX_FILE_SIZE:
+                        break
+                    digest.update(chunk)
+                    pending += chunk
+                    if len(pending) >= UPLOAD_WRITE_BUFFER:
+                        await run_in_threadpool(f.write, pending)
+                        pending = bytearray()
+                    chunk = await file.read(UPLOAD_CHUNK_SIZE)
+                if pending and file_size <= MAX_FILE_SIZE:
+                    await run_in_threadpool(f.write, pending)
+            finally:
+                await run_in_threadpool(f.close)
+
+            if file_size > MAX_FILE_SIZE:
+                raise HTTPException(status_code=413, detail="File too large")
+
+            content_hash = digest.hexdigest()
+            stored_filename = f"{content_hash}{file_ext}"
+            stored_path = os.path.join(_UPLOAD_DIR_STR, stored_filename)
+            duplicate = await run_in_threadpool(os.path.exists, stored_path)
+            if duplicate:
+                await run_in_threadpool(os.remove, tmp_path)
+            else:
+                await run_in_threadpool(os.replace, tmp_path, stored_path)
+        except BaseException:
+            # Never leave the .part behind: oversize, a failed read or write
+            # (e.g. ENOSPC) or a client disconnect. Done inline, since an
+            # awaited call could itself be cancelled again.
+            f.close()
+            with suppress(FileNotFoundError):
+                os.remove(tmp_path)
+            raise
+
+        logger.info("File uploaded successfully: %s (%s, duplicate=%s)", file.filename, content_hash, duplicate)
         return {
             "status": "success",
             "message": "File uploaded successfully",
             "filename": file.filename,
-            "file_size": len(file_content)
+            "stored_filename": stored_filename,
+            "content_hash": content_hash,
+            "file_size": file_size
         }
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error uploading file: {str(e)}")
+        logger.error("Error uploading file: %s", e)
         raise HTTPException(status_code=500, detail=f"Error uploading file: {str(e)}")
 
 
-@app.post("/api/resumes/{resume_id}/edit", tags=["Resume Editing"])
-async def edit_resume_with_prompt(
-    resume_id: int,
-    prompt: str = Form(...),
-    user_id: Optional[int] = Form(default=None),
-    db: Session = Depends(get_db),
-):
-    """Edit a resume using a text prompt. Checks prompt count limits.
+def _load_edit_target(db: Session, resume_id: int, user_id: Optional[int]):
+    """Fetch ``(user, resume)`` for an AI edit, enforcing the edit quota.
 
-    Guests (no user_id) may edit their resume up to MAX_PROMPTS_GUEST times.
-    Logged-in users are limited by their membership tier.
+    ``user`` is None for guests. Raises 404 for a missing user or resume and
+    403 once the user's tier limit or the guest limit has been reached.
     """
     if user_id:
         # ── Logged-in user ────────────────────────────────────────────────
@@ -738,66 +1517,75 @@ async def edit_resume_with_prompt(
         resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user_id).first()
         if not resume:
             raise HTTPException(status_code=404, detail="Resume not found")
-    else:
-        # ── Guest ─────────────────────────────────────────────────────────
-        resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id.is_(None)).first()
-        if not resume:
-            raise HTTPException(status_code=404, detail="Resume not found")
+        return user, resume
 
-        if (resume.guest_edit_count or 0) >= MAX_PROMPTS_GUEST:
-            raise HTTPException(
-                status_code=403,
-                detail=f"You've used all {MAX_PROMPTS_GUEST} free edits. Sign up for a paid plan to get 50 edits!"
-            )
+    # ── Guest ─────────────────────────────────────────────────────────────
+    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id.is_(None)).first()
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+
+    if (resume.guest_edit_count or 0) >= MAX_PROMPTS_GUEST:
+        raise HTTPException(
+            status_code=403,
+            detail=f"You've used all {MAX_PROMPTS_GUEST} free edits. Sign up for a paid plan to get 50 edits!"
+        )
+    return None, resume
+
+
+@app.post("/api/resumes/{resume_id}/edit", tags=["Resume Editing"])
+async def edit_resume_with_prompt(
+    resume_id: int,
+    prompt: str = Form(...),
+    user_id: Optional[int] = Form(default=None),
+    db: Session = Depends(get_db),
+):
+    """Edit a resume using a text prompt. Checks prompt count limits.
+
+    Guests (no user_id) may edit their resume up to MAX_PROMPTS_GUEST times.
+    Logged-in users are limited by their membership tier.
+    """
+    user, resume = await asyncio.to_thread(_load_edit_target, db, resume_id, user_id)
+    if user is not None:
+        max_prompts = get_max_prompts_for_tier(user.membership_tier)
     
     if not resume.resume_data:
         raise HTTPException(status_code=400, detail="Resume data not available for editing")
     
     # Parse existing resume data
-    current_data = json.loads(resume.resume_data)
-    
-    # Create edit prompt
-    edit_prompt = f"""You are editing an existing resume. The user wants to make the following change:
+    current_data = orjson.loads(resume.resume_data)
 
-USER REQUEST: {prompt}
-
-CURRENT RESUME DATA (JSON):
-{json.dumps(current_data, indent=2)}
-
-Please update the resume JSON to reflect the requested changes. Maintain the same structure and format.
-Return ONLY the updated JSON object — no other text."""
+    # Create edit prompt. Compact UTF-8 JSON: indentation and \uXXXX escapes
+    # are billed as input tokens without adding anything for the model.
+    edit_prompt = build_edit_prompt(orjson.dumps(current_data).decode(), prompt)
     
     if not openai_client:
         raise HTTPException(status_code=503, detail="OpenAI API not configured")
     
     try:
-        response = openai_client.chat.completions.create(
+        response = await create_chat_completion(
             model=OPENAI_MODEL,
             messages=[
-                {"role": "system", "content": SYSTEM_PROMPT_GENERATE},
+                SYSTEM_MESSAGE_GENERATE,
                 {"role": "user", "content": edit_prompt},
             ],
             temperature=0.3,
             response_format={"type": "json_object"},
-            timeout=120,
+            prompt_cache_key=PROMPT_CACHE_KEY_GENERATE,
         )
-        updated_data = json.loads(response.choices[0].message.content)
+        updated_data = structured_output_to_resume(orjson.loads(response.choices[0].message.content))
 
         # Update resume — preserve the template that was last applied
         active_template = resume.template_id or "modern"
-        resume_builder = ResumeBuilder()
-        resume_filename = f"resume_{uuid.uuid4().hex[:10]}.docx"
-        resume_path = RESUMES_DIR / resume_filename
-        resume_builder.build_word_document(str(resume_path), updated_data, template_id=active_template)
-        preview_html = resume_builder.build_html_preview(updated_data, template_id=active_template)
+        _, resume_path, preview_html = await asyncio.to_thread(
+            _render_generated_resume, updated_data, active_template
+        )
         
-        resume.resume_data = json.dumps(updated_data)
+        resume.resume_data = orjson.dumps(updated_data).decode()
         resume.preview_html = preview_html
         resume.file_path = str(resume_path)
-        resume.updated_at = datetime.utcnow()
 
         # Increment the appropriate counter and build the remaining-edits info
-        if user_id:
+        if user is not None:
             user.prompt_count += 1
             prompt_count = user.prompt_count
             remaining = max(0, max_prompts - prompt_count)
@@ -807,8 +1595,7 @@ Return ONLY the updated JSON object — no other text."""
             max_prompts = MAX_PROMPTS_GUEST
             remaining = max(0, MAX_PROMPTS_GUEST - prompt_count)
 
-        db.commit()
-        db.refresh(resume)
+        await asyncio.to_thread(db.commit)
 
         return {
             "status": "success",
@@ -821,13 +1608,21 @@ Return ONLY the updated JSON object — no other text."""
         }
     except json.JSONDecodeError:
         raise HTTPException(status_code=500, detail="AI returned invalid format")
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="AI edit timed out. Please try again.")
+    except AuthenticationError as e:
+        logger.error("OpenAI rejected the API key: %s", e)
+        raise HTTPException(status_code=503, detail="AI service is not available. Please try again later.")
+    except RateLimitError as e:
+        logger.warning("OpenAI rate limit hit: %s", e)
+        raise HTTPException(status_code=429, detail="AI service is busy. Please try again shortly.")
     except Exception as e:
-        logger.error(f"Error editing resume: {e}")
+        logger.error("Error editing resume: %s", e)
         raise HTTPException(status_code=500, detail=f"Error editing resume: {str(e)}")
 
 
 @app.put("/api/resumes/{resume_id}/update", tags=["Resume Editing"])
-async def update_resume_inline(
+def update_resume_inline(
     resume_id: int,
     resume_data: dict = Body(...),
     user_id: int = Body(...),
@@ -841,17 +1636,11 @@ async def update_resume_inline(
     
     # Rebuild preview and document — preserve the template that was last applied
     active_template = resume.template_id or "modern"
-    resume_builder = ResumeBuilder()
-    resume_filename = f"resume_{uuid.uuid4().hex[:10]}.docx"
-    safe_filename = sanitize_filename(resume_filename)
-    resume_path = RESUMES_DIR / safe_filename
-    resume_builder.build_word_document(str(resume_path), resume_data, template_id=active_template)
-    preview_html = resume_builder.build_html_preview(resume_data, template_id=active_template)
+    safe_filename, resume_path, preview_html = _render_generated_resume(resume_data, active_template)
     
-    resume.resume_data = json.dumps(resume_data)
+    resume.resume_data = orjson.dumps(resume_data).decode()
     resume.preview_html = preview_html
     resume.file_path = str(resume_path)
-    resume.updated_at = datetime.utcnow()
     
     db.commit()
 
@@ -866,7 +1655,7 @@ async def update_resume_inline(
 
 
 @app.post("/api/resumes/{resume_id}/switch-template", tags=["Resume Editing"])
-async def switch_resume_template(
+def switch_resume_template(
     resume_id: int,
     template_id: str = Form(...),
     user_id: Optional[int] = Form(default=None),
@@ -892,18 +1681,12 @@ async def switch_resume_template(
     if template_id not in valid_template_ids:
         raise HTTPException(status_code=400, detail=f"Unknown template '{template_id}'")
 
-    resume_data = json.loads(resume.resume_data)
-    resume_builder = ResumeBuilder()
-    resume_filename = f"resume_{uuid.uuid4().hex[:10]}.docx"
-    safe_filename = sanitize_filename(resume_filename)
-    resume_path = RESUMES_DIR / safe_filename
-    resume_builder.build_word_document(str(resume_path), resume_data, template_id=template_id)
-    preview_html = resume_builder.build_html_preview(resume_data, template_id=template_id)
+    resume_data = orjson.loads(resume.resume_data)
+    safe_filename, resume_path, preview_html = _render_generated_resume(resume_data, template_id)
 
     resume.preview_html = preview_html
     resume.file_path = str(resume_path)
     resume.template_id = template_id
-    resume.updated_at = datetime.utcnow()
     db.commit()
 
     return {
@@ -915,9 +1698,11 @@ async def switch_resume_template(
 
 
 @app.get("/api/users/{user_id}/prompt-info", tags=["User"])
-async def get_prompt_info(user_id: int, db: Session = Depends(get_db)):
+def get_prompt_info(user_id: int, db: Session = Depends(get_db)):
     """Get user's prompt count and membership tier."""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = db.execute(
+        select(User.prompt_count, User.membership_tier).where(User.id == user_id)
+    ).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
@@ -947,6 +1732,12 @@ async def get_template_previews():
     Used by the frontend template carousel so users can see a realistic
     full-resume preview before selecting a layout. No authentication required.
     """
+    return ORJSONResponse(_render_template_previews())
+
+
+@lru_cache(maxsize=1)
+def _render_template_previews() -> dict:
+    """Render the carousel previews once; they depend only on module constants."""
     builder = ResumeBuilder()
     return {
         tmpl["id"]: builder.build_html_preview(DUMMY_CANDIDATE, tmpl["id"])
@@ -957,4 +1748,15 @@ async def get_template_previews():
 if __name__ == "__main__":
     import uvicorn
     port = int(os.getenv("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # WORKERS processes, each on uvloop with the httptools parser where those
+    # are installed ("auto" falls back to asyncio/h11, e.g. on Windows);
+    # workers need the app as an import string so each process can load it.
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=WORKERS,
+        loop="auto",
+        http="auto",
+        log_level="info",
+    )
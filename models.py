@@ -7,13 +7,46 @@ users   — registered user accounts with profile and membership details
 resumes — generated resume records linked to users (or stored as guest resumes)
 """
 
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base
-from datetime import datetime
+from sqlalchemy.sql.expression import FunctionElement
 import hashlib
+import hmac
+import secrets
 
 Base = declarative_base()
 
+# scrypt cost parameters for new password hashes (~16 MiB and tens of ms per
+# hash). They are stored in each hash, so raising them later only affects
+# passwords set or upgraded afterwards.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+_SCRYPT_PREFIX = 'scrypt$'
+
+
+class utcnow(FunctionElement):
+    """The database's current time in UTC, as a naive timestamp.
+
+    The timestamp columns are naive ``DateTime`` holding UTC, so plain
+    ``now()`` is not enough on PostgreSQL, where it is rendered in the
+    session's TimeZone.
+    """
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(utcnow)
+def _utcnow_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(utcnow, "postgresql")
+def _utcnow_postgresql(element, compiler, **kw):
+    return "timezone('utc', now())"
+
 
 class User(Base):
     """
@@ -24,7 +57,8 @@ class User(Base):
     id                   : primary key
     name                 : display name entered at signup
     email                : unique login identifier
-    password_hash        : SHA-256 hash of the user's password
+    password_hash        : salted scrypt hash of the user's password
+                           (legacy rows: unsalted SHA-256, upgraded on login)
     professional_summary : optional cached summary from the user's profile
     skills               : JSON-encoded list of skills (e.g. '["Python", "React"]')
     experience           : JSON-encoded list of work-experience objects
@@ -52,22 +86,45 @@ class User(Base):
     membership_tier = Column(String, default='free')  # 'free', 'pro', 'enterprise'
     prompt_count = Column(Integer, default=0)         # Number of AI editing prompts used
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Stamped by the database: utcnow() is rendered into the INSERT/UPDATE itself
+    # rather than sent as a bound parameter. server_default covers fresh tables;
+    # the SQL-expression default keeps tables created before it populated too.
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
 
     @staticmethod
     def hash_password(password: str) -> str:
         """
-        Return a SHA-256 hex digest of *password*.
+        Return a salted scrypt hash of *password*.
 
-        Note: SHA-256 is used here for simplicity. In a production system,
-        replace this with bcrypt or Argon2 for proper password security.
+        Format: ``scrypt$<n>$<r>$<p>$<salt hex>$<hash hex>``. scrypt is
+        deliberately slow and memory-hard; call it from a worker thread, not
+        the event loop.
         """
-        return hashlib.sha256(password.encode()).hexdigest()
+        salt = secrets.token_bytes(16)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P)
+        return f"{_SCRYPT_PREFIX}{SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${salt.hex()}${digest.hex()}"
 
     def verify_password(self, password: str) -> bool:
-        """Return True if *password* matches the stored hash."""
-        return self.password_hash == self.hash_password(password)
+        """Return True if *password* matches the stored hash (constant-time compare)."""
+        stored = self.password_hash or ''
+        # A truncated or corrupted hash (or a cost beyond scrypt's memory
+        # limit) is a failed login, not a server error.
+        try:
+            if not stored.startswith(_SCRYPT_PREFIX):
+                # Legacy unsalted SHA-256 hex digest
+                legacy = hashlib.sha256(password.encode()).hexdigest()
+                return hmac.compare_digest(stored, legacy)
+            n, r, p, salt, expected = stored[len(_SCRYPT_PREFIX):].split('$')
+            digest = hashlib.scrypt(password.encode(), salt=bytes.fromhex(salt), n=int(n), r=int(r), p=int(p))
+            return hmac.compare_digest(digest.hex(), expected)
+        except (ValueError, TypeError):
+            return False
+
+    @property
+    def password_needs_rehash(self) -> bool:
+        """True if the stored hash predates scrypt or uses older cost parameters."""
+        return not (self.password_hash or '').startswith(f"{_SCRYPT_PREFIX}{SCRYPT_N}${SCRYPT_R}${SCRYPT_P}$")
 
 
 class Resume(Base):
@@ -90,11 +147,18 @@ class Resume(Base):
     contact_info         : JSON-encoded contact details (email, phone, location, linkedin)
     resume_data          : full JSON snapshot of the AI-generated resume — used for editing
     preview_html         : self-contained HTML string for the in-browser preview iframe
+    batch_id             : OpenAI Batch API id while a batch-priority generation is pending
+    summary_status       : 'pending' while a background summary enhancement runs, then 'ready'
     created_at           : UTC timestamp when the resume was created
     updated_at           : UTC timestamp of the last update (auto-updated by ORM)
     """
 
     __tablename__ = 'resumes'
+    __table_args__ = (
+        # Serves the per-user resume list (filter on user_id, newest first);
+        # its user_id prefix also covers plain user_id lookups.
+        Index('ix_resumes_user_created', 'user_id', 'created_at'),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey('users.id'), nullable=True)  # NULL = guest resume
@@ -120,5 +184,11 @@ class Resume(Base):
     # Number of AI edits consumed by a guest (no account) on this resume
     guest_edit_count = Column(Integer, default=0)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # OpenAI batch id for resumes generated with priority=batch (NULL otherwise)
+    batch_id = Column(String, nullable=True, index=True)
+
+    # 'pending' / 'ready' for wizard resumes with enhance=background (NULL otherwise)
+    summary_status = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=utcnow(), server_default=utcnow())
+    updated_at = Column(DateTime, default=utcnow(), server_default=utcnow(), onupdate=utcnow())
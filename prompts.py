@@ -9,12 +9,25 @@ This module contains two separate prompt strategies:
                                 analysis, content strategy, content generation, JSON output).
    - `build_generate_prompt`  : assembles the user-facing prompt from uploaded document text,
                                 an optional job description, and optional additional information.
+   - `RESPONSE_FORMAT_GENERATE`: strict structured-output schema for generate calls;
+                                `structured_output_to_resume` maps a response back to
+                                the resume dict.
+   - `build_edit_prompt`      : wraps a stored resume and a free-text change request for the
+                                AI edit endpoint (POST /api/resumes/{id}/edit).
+
+   Both builders put fixed text first and request-specific data last, so the
+   system prompt plus the leading instructions form an identical prefix that
+   OpenAI's automatic prompt caching can reuse across calls. Each flow also
+   sends a fixed ``prompt_cache_key`` (``PROMPT_CACHE_KEY_*``) so those calls
+   are routed to the same cache.
 
 2. **Legacy wizard-based generation** (POST /api/generate-resume)
    - `SYSTEM_PROMPT_DRAFT`    : simpler prompt used to enhance a manually filled-in summary.
    - `create_resume_prompt`   : formats structured candidate data into a plain-text prompt.
 """
 
+import string
+
 # ── Document-based AI generation (primary flow) ────────────────────────────
 
 SYSTEM_PROMPT_GENERATE = """You are an expert Australian resume writer. Your task is to generate high-quality, ATS-friendly resume content from the inputs provided, then output structured JSON for downstream document formatting.
@@ -211,7 +224,7 @@ Degree, institution, year — clean and minimal. Include relevant short courses
 
 **7. Certifications** — only if populated in source material
 
-**8. Technical Skills** — only if populated in source material. Use category labels where natural (e.g. Platforms, Languages, Tools). If categories don't apply, use a single "General" key or flat list under one key.
+**8. Technical Skills** — only if populated in source material. Use category labels where natural (e.g. Platforms, Languages, Tools). If categories don't apply, use a single "General" category.
 
 **9. Additional Information** — only if genuinely relevant supplementary information exists (security clearance, languages, professional memberships). Never pad.
 
@@ -221,7 +234,7 @@ Degree, institution, year — clean and minimal. Include relevant short courses
 
 Respond with ONLY valid JSON — no prose, no markdown, no code fences, no explanation before or after the JSON.
 
-Every key must be present even when empty. Empty sections use empty arrays [] or empty strings "" or empty objects {} — never omit a key.
+Every key must be present even when empty. Empty sections use empty arrays [] or empty strings "" — never omit a key.
 
 The JSON must strictly follow this schema:
 
@@ -263,11 +276,11 @@ The JSON must strictly follow this schema:
   "certifications": [
     "Certification Name (Year)"
   ],
-  "technical_skills": {
-    "Platforms": ["item1", "item2"],
-    "Languages": ["item1", "item2"],
-    "Tools": ["item1", "item2"]
-  },
+  "technical_skills": [
+    {"category": "Platforms", "items": ["item1", "item2"]},
+    {"category": "Languages", "items": ["item1", "item2"]},
+    {"category": "Tools", "items": ["item1", "item2"]}
+  ],
   "additional_information": [
     "Security clearance: Baseline",
     "Professional memberships: CPA Australia"
@@ -277,13 +290,21 @@ The JSON must strictly follow this schema:
 IMPORTANT SCHEMA NOTES:
 - "summary" (not "professional_summary") — this is the correct key
 - "education[].year" (not "graduation_year") — this is the correct key
-- "technical_skills" is an OBJECT with category label keys — not an array. Use {} if none.
+- "technical_skills" is an ARRAY of {"category", "items"} objects, one per category label — use [] if none.
 - "additional_information" is an ARRAY of strings — use [] if none.
 - Dates format: "Month Year – Month Year" using an en dash (–), e.g. "Jan 2019 – Mar 2022"
 - Location format: "City, State" e.g. "Sydney, NSW"
 - Australian spelling throughout — no US spelling anywhere in the output"""
 
 
+_ADDITIONAL_INFO_HEADER = """=== ADDITIONAL INFORMATION ===
+The candidate has provided the following additional context. Incorporate relevant facts and examples naturally throughout the resume — woven into bullets, the summary, and skills — not mentioned once and forgotten.
+
+"""
+
+_GENERATE_PROMPT_FOOTER = "Generate the resume JSON now. Respond with ONLY the JSON object — no other text before or after."
+
+
 def build_generate_prompt(documents_text: str, job_description: str, additional_info: str = "") -> str:
     """Assemble the user-facing prompt for document-based resume generation.
 
@@ -334,30 +355,122 @@ def build_generate_prompt(documents_text: str, job_description: str, additional_
             "Mirror the JD's exact keywords and phrasing throughout."
         )
 
-    prompt = f"""{mode_instruction}
-
-=== CANDIDATE DOCUMENTS ===
-{documents_text}"""
+    # Sections are joined once: documents_text can run to hundreds of KB, and
+    # each ``+=`` would copy everything assembled so far.
+    sections = [mode_instruction, f"=== CANDIDATE DOCUMENTS ===\n{documents_text}"]
 
     if jd_stripped:
-        prompt += f"""
-
-=== JOB DESCRIPTION ===
-{jd_stripped}"""
+        sections.append(f"=== JOB DESCRIPTION ===\n{jd_stripped}")
 
     if additional_info and additional_info.strip():
-        prompt += f"""
+        sections.append(_ADDITIONAL_INFO_HEADER + additional_info.strip())
 
-=== ADDITIONAL INFORMATION ===
-The candidate has provided the following additional context. Incorporate relevant facts and examples naturally throughout the resume — woven into bullets, the summary, and skills — not mentioned once and forgotten.
+    sections.append(_GENERATE_PROMPT_FOOTER)
+    return "\n\n".join(sections)
+
+
+# Reused as the first chat message of every generate/edit call — treat as read-only.
+SYSTEM_MESSAGE_GENERATE = {"role": "system", "content": SYSTEM_PROMPT_GENERATE}
+
+# Sent as ``prompt_cache_key`` so OpenAI routes calls sharing a system prompt to
+# the same cache shard; only the user message after the prefix may vary.
+PROMPT_CACHE_KEY_GENERATE = "resume-generate-v1"
+
+
+def _strict_object(properties: dict) -> dict:
+    # Structured outputs in strict mode need every key required and no extras
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+_STRING = {"type": "string"}
+_STRING_LIST = {"type": "array", "items": _STRING}
+
+# JSON schema for the generate response, matching the schema spelled out in
+# SYSTEM_PROMPT_GENERATE. Strict mode cannot express an object with free-form
+# keys, so technical_skills is a list of {category, items} pairs here and is
+# folded back into the document builder's object form by
+# `structured_output_to_resume`.
+RESUME_JSON_SCHEMA = _strict_object({
+    "name": _STRING,
+    "contact": _strict_object({
+        "email": _STRING,
+        "phone": _STRING,
+        "location": _STRING,
+        "linkedin": _STRING,
+    }),
+    "summary": _STRING,
+    "key_skills": _STRING_LIST,
+    "experience": {"type": "array", "items": _strict_object({
+        "title": _STRING,
+        "company": _STRING,
+        "location": _STRING,
+        "dates": _STRING,
+        "bullets": _STRING_LIST,
+    })},
+    "education": {"type": "array", "items": _strict_object({
+        "degree": _STRING,
+        "institution": _STRING,
+        "year": _STRING,
+    })},
+    "awards": _STRING_LIST,
+    "certifications": _STRING_LIST,
+    "technical_skills": {"type": "array", "items": _strict_object({
+        "category": _STRING,
+        "items": _STRING_LIST,
+    })},
+    "additional_information": _STRING_LIST,
+})
+
+# ``response_format`` for generate calls: the sampler can only emit JSON that
+# matches RESUME_JSON_SCHEMA, so responses always parse.
+RESPONSE_FORMAT_GENERATE = {
+    "type": "json_schema",
+    "json_schema": {"name": "resume", "strict": True, "schema": RESUME_JSON_SCHEMA},
+}
+
+
+def structured_output_to_resume(data: dict) -> dict:
+    """Convert a RESUME_JSON_SCHEMA response to the resume dict used downstream.
+
+    Only ``technical_skills`` differs: its list of ``{category, items}`` pairs
+    becomes the ``{category: items}`` object the document builder expects.
+    Data already in that form is returned unchanged.
+    """
+    tech = data.get("technical_skills")
+    if isinstance(tech, list) and all(isinstance(t, dict) for t in tech):
+        data["technical_skills"] = {t.get("category", ""): t.get("items", []) for t in tech}
+    return data
+
+
+EDIT_INSTRUCTIONS = """You are editing an existing resume. Apply the user's requested change to the resume JSON below.
+Keep the same structure, keys and formatting conventions; change only what the request asks for.
+Return ONLY the updated JSON object — no other text."""
+
+
+# Built once at import; only the two placeholders vary per request.
+_EDIT_PROMPT_TEMPLATE = string.Template(EDIT_INSTRUCTIONS + """
+
+=== CURRENT RESUME DATA (JSON) ===
+$current_data_json
 
-{additional_info.strip()}"""
+=== USER REQUEST ===
+$user_request""")
 
-    prompt += """
 
-Generate the resume JSON now. Respond with ONLY the JSON object — no other text before or after."""
+def build_edit_prompt(current_data_json: str, user_request: str) -> str:
+    """Assemble the user prompt for an AI edit of a stored resume.
 
-    return prompt
+    The static ``EDIT_INSTRUCTIONS`` lead, followed by the current resume JSON
+    and finally the user's request, which is the part that varies most.
+    """
+    return _EDIT_PROMPT_TEMPLATE.substitute(
+        current_data_json=current_data_json, user_request=user_request
+    )
 
 
 # ── Legacy prompts (kept for /api/generate-resume wizard endpoint) ──────────
@@ -378,6 +491,11 @@ Format the resume clearly for ATS (Applicant Tracking Systems) and human recruit
 Use action verbs and quantify achievements where possible."""
 
 
+# Reused as the first chat message of every wizard enhancement — treat as read-only.
+SYSTEM_MESSAGE_DRAFT = {"role": "system", "content": SYSTEM_PROMPT_DRAFT}
+PROMPT_CACHE_KEY_DRAFT = "resume-draft-v1"
+
+
 def create_resume_prompt(candidate_data: dict) -> str:
     """Build a plain-text prompt for the legacy wizard-based generation endpoint.
 
@@ -402,50 +520,46 @@ def create_resume_prompt(candidate_data: dict) -> str:
     # Support both new schema key ("summary") and legacy key ("professional_summary")
     summary_text = candidate_data.get('summary') or candidate_data.get('professional_summary', 'N/A')
 
-    prompt = f"""Generate a professional resume for the following candidate:
-
-Name: {candidate_data.get('name', 'N/A')}
-Email: {candidate_data.get('contact', {}).get('email', 'N/A')}
-Phone: {candidate_data.get('contact', {}).get('phone', 'N/A')}
-Location: {candidate_data.get('contact', {}).get('location', 'N/A')}
-
-Professional Summary:
-{summary_text}
-
-Key Skills: {', '.join(candidate_data.get('key_skills', []))}
-
-Work Experience:
-"""
+    contact = candidate_data.get('contact', {})
+    # Collect fragments and join once; repeated ``+=`` re-copies the whole
+    # prompt for every bullet and grows quadratically with candidate size.
+    parts = [
+        "Generate a professional resume for the following candidate:\n\n",
+        f"Name: {candidate_data.get('name', 'N/A')}\n",
+        f"Email: {contact.get('email', 'N/A')}\n",
+        f"Phone: {contact.get('phone', 'N/A')}\n",
+        f"Location: {contact.get('location', 'N/A')}\n\n",
+        f"Professional Summary:\n{summary_text}\n\n",
+        f"Key Skills: {', '.join(candidate_data.get('key_skills', []))}\n\n",
+        "Work Experience:\n",
+    ]
     for exp in candidate_data.get('experience', []):
-        prompt += f"""
-- {exp.get('title', 'N/A')} at {exp.get('company', 'N/A')}, {exp.get('location', 'N/A')}
-  Dates: {exp.get('dates', 'N/A')}
-  Achievements:
-"""
-        for bullet in exp.get('bullets', []):
-            prompt += f"  • {bullet}\n"
+        parts.append(
+            f"\n- {exp.get('title', 'N/A')} at {exp.get('company', 'N/A')}, {exp.get('location', 'N/A')}\n"
+            f"  Dates: {exp.get('dates', 'N/A')}\n"
+            "  Achievements:\n"
+        )
+        parts.extend(f"  • {bullet}\n" for bullet in exp.get('bullets', []))
 
-    prompt += "\nEducation:\n"
+    parts.append("\nEducation:\n")
     for edu in candidate_data.get('education', []):
         # Support both new schema key ("year") and legacy key ("graduation_year")
         year = edu.get('year') or edu.get('graduation_year', 'N/A')
-        prompt += f"- {edu.get('degree', 'N/A')} from {edu.get('institution', 'N/A')} ({year})\n"
+        parts.append(f"- {edu.get('degree', 'N/A')} from {edu.get('institution', 'N/A')} ({year})\n")
 
     if candidate_data.get('certifications'):
-        prompt += f"\nCertifications: {', '.join(candidate_data.get('certifications', []))}\n"
+        parts.append(f"\nCertifications: {', '.join(candidate_data.get('certifications', []))}\n")
 
     if candidate_data.get('awards'):
-        prompt += f"\nAwards: {', '.join(candidate_data.get('awards', []))}\n"
+        parts.append(f"\nAwards: {', '.join(candidate_data.get('awards', []))}\n")
 
     # technical_skills may be a dict (new schema) or list (legacy)
     tech = candidate_data.get('technical_skills', {})
     if tech:
         if isinstance(tech, dict):
-            tech_items = []
-            for cat, items in tech.items():
-                tech_items.append(f"{cat}: {', '.join(str(i) for i in items)}")
-            prompt += f"\nTechnical Skills: {' | '.join(tech_items)}\n"
+            tech_items = [f"{cat}: {', '.join(str(i) for i in items)}" for cat, items in tech.items()]
+            parts.append(f"\nTechnical Skills: {' | '.join(tech_items)}\n")
         else:
-            prompt += f"\nTechnical Skills: {', '.join(str(s) for s in tech)}\n"
+            parts.append(f"\nTechnical Skills: {', '.join(str(s) for s in tech)}\n")
 
-    return prompt
+    return "".join(parts)
@@ -10,8 +10,6 @@ Demo credentials:
 """
 import sys
 import json
-import hashlib
-from datetime import datetime
 
 sys.path.insert(0, ".")
 
@@ -23,10 +21,6 @@ DEMO_PASSWORD = "demo1234"
 DEMO_NAME = "Alex Demo"
 
 
-def hash_password(password: str) -> str:
-    return hashlib.sha256(password.encode()).hexdigest()
-
-
 def main():
     init_db()
     db = SessionLocal()
@@ -81,13 +75,11 @@ def main():
         user = User(
             name=DEMO_NAME,
             email=DEMO_EMAIL,
-            password_hash=hash_password(DEMO_PASSWORD),
+            password_hash=User.hash_password(DEMO_PASSWORD),
             professional_summary=summary,
             skills=skills,
             experience=experience,
             education=education,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
         )
         db.add(user)
         db.flush()  # get user.id before commit
@@ -109,8 +101,6 @@ def main():
             experience=experience,
             education=education,
             contact_info=contact_info,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
         )
         db.add(resume)
         db.commit()
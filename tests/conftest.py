@@ -0,0 +1,16 @@
+"""
+Shared pytest fixtures.
+"""
+import sys
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _clear_openai_caches():
+    """Start every test with empty OpenAI response caches so mocks are always hit."""
+    main = sys.modules.get("main")
+    if main is not None:
+        main._summary_cache.clear()
+        main._generate_cache.clear()
+    yield
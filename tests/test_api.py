@@ -3,12 +3,14 @@ Integration tests for the FastAPI application (main.py).
 Uses TestClient from httpx/starlette – no real database calls for most tests
 (the DB is SQLite in-memory or a temp file).
 """
+import asyncio
 import io
 import os
 import json
 import pytest
+from contextlib import contextmanager
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 # Use a temp SQLite DB to avoid touching the production DB
 os.environ.setdefault("DATABASE_URL", "sqlite:///./test_temp.db")
@@ -19,6 +21,66 @@ from main import app
 client = TestClient(app)
 
 
+def _chat_response(content):
+    """A chat completion whose first choice carries *content*."""
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+
+def _mock_openai_client(monkeypatch, content=None, side_effect=None):
+    """Patch a mocked openai_client into main and return it.
+
+    Completions answer with *content* (the sample resume JSON by default), or
+    follow *side_effect* when given.
+    """
+    mock_client = MagicMock()
+    if side_effect is not None:
+        mock_client.chat.completions.create = AsyncMock(side_effect=side_effect)
+    else:
+        if content is None:
+            content = json.dumps(MOCK_RESUME_JSON)
+        mock_client.chat.completions.create = AsyncMock(return_value=_chat_response(content))
+    monkeypatch.setattr("main.openai_client", mock_client)
+    return mock_client
+
+
+def _rate_limit_error():
+    import httpx
+    from openai import RateLimitError
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    return RateLimitError("slow down", response=httpx.Response(429, request=request), body=None)
+
+
+def _signup_user(prefix):
+    """Sign up a fresh user with a unique *prefix*_xxxxxxxx email and return its id."""
+    import uuid
+    resp = client.post("/api/auth/signup", json={
+        "name": f"{prefix.title()} User",
+        "email": f"{prefix}_{uuid.uuid4().hex[:8]}@example.com",
+        "password": "password123",
+    })
+    assert resp.status_code == 200
+    return resp.json()["user_id"]
+
+
+@contextmanager
+def _captured_sql():
+    """Collect ``(statement, parameters)`` for every SQL statement run in the block."""
+    from sqlalchemy import event
+    from database import engine
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+
+
 # ── Health endpoints ─────────────────────────────────────────────────────────
 
 class TestHealth:
@@ -87,6 +149,42 @@ class TestAuth:
         resp = client.post("/api/auth/login", json={"email": email, "password": "wrong"})
         assert resp.status_code == 401
 
+    def test_signup_stores_salted_scrypt_hash(self):
+        import uuid
+        from database import SessionLocal
+        from models import User
+        emails = [f"scrypt_{uuid.uuid4().hex[:8]}@example.com" for _ in range(2)]
+        for email in emails:
+            resp = client.post("/api/auth/signup", json={"name": "Hash User", "email": email, "password": "samepass"})
+            assert resp.status_code == 200
+        with SessionLocal() as db:
+            hashes = [db.query(User).filter(User.email == e).one().password_hash for e in emails]
+        assert all(h.startswith("scrypt$") for h in hashes)
+        assert hashes[0] != hashes[1]
+
+    def test_login_upgrades_legacy_sha256_hash(self):
+        import hashlib
+        import uuid
+        from database import SessionLocal
+        from models import User
+        email = f"legacy_{uuid.uuid4().hex[:8]}@example.com"
+        with SessionLocal() as db:
+            db.add(User(name="Legacy", email=email,
+                        password_hash=hashlib.sha256(b"oldpass1").hexdigest()))
+            db.commit()
+
+        assert client.post("/api/auth/login", json={"email": email, "password": "wrong"}).status_code == 401
+        assert client.post("/api/auth/login", json={"email": email, "password": "oldpass1"}).status_code == 200
+        with SessionLocal() as db:
+            assert db.query(User).filter(User.email == email).one().password_hash.startswith("scrypt$")
+        assert client.post("/api/auth/login", json={"email": email, "password": "oldpass1"}).status_code == 200
+
+    def test_corrupted_password_hash_rejects_login(self):
+        from models import User
+        for stored in ("scrypt$16384$8", "scrypt$16384$8$1$zz$00", "scrypt$x$8$1$00$00",
+                       "scrypt$1073741824$8$1$00$00", "é" * 64):
+            assert User(password_hash=stored).verify_password("anything") is False, stored
+
     def test_login_nonexistent_user_returns_401(self):
         resp = client.post("/api/auth/login", json={
             "email": "nobody_xyz_zz@example.com",
@@ -196,6 +294,16 @@ class TestGenerateResume:
         assert "download_url" in data
         assert data["download_url"].startswith("/api/resumes/download-file/")
 
+    def test_generated_filenames_are_unique(self):
+        import re
+        names = {
+            client.post("/api/generate-resume", json=SAMPLE_CANDIDATE).json()["data"]["filename"]
+            for _ in range(2)
+        }
+        assert len(names) == 2
+        for name in names:
+            assert re.fullmatch(r"resume_[0-9a-f]{16}_[A-Za-z0-9._-]+\.docx", name)
+
     def test_generate_missing_name_returns_422(self):
         bad = dict(SAMPLE_CANDIDATE)
         del bad["name"]
@@ -208,6 +316,186 @@ class TestGenerateResume:
         resp = client.post("/api/generate-resume", json=bad)
         assert resp.status_code == 422
 
+    def test_repeated_candidate_reuses_enhanced_summary(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch, content="Enhanced summary.")
+
+        for _ in range(2):
+            resp = client.post("/api/generate-resume", json=SAMPLE_CANDIDATE)
+            assert resp.status_code == 200
+        assert mock_client.chat.completions.create.await_count == 1
+
+    def test_polished_summary_skips_enhancement(self, monkeypatch):
+        polished = (
+            "Platform engineer with nine years of experience running high-traffic Python services "
+            "for retail and banking clients across Australia. Designed and shipped an event-driven "
+            "order pipeline handling peak sale loads, mentored four junior developers, and reduced "
+            "deployment lead time from days to under an hour with automated testing."
+        )
+        mock_client = _mock_openai_client(monkeypatch)
+
+        resp = client.post("/api/generate-resume", json={**SAMPLE_CANDIDATE, "professional_summary": polished})
+        assert resp.status_code == 200
+        mock_client.chat.completions.create.assert_not_awaited()
+
+    def test_concurrent_identical_enhancements_share_one_call(self, monkeypatch):
+        import main
+        async def slow_create(**kwargs):
+            await asyncio.sleep(0.05)
+            return _chat_response("Enhanced summary.")
+
+        mock_client = _mock_openai_client(monkeypatch, side_effect=slow_create)
+        candidate = main.CandidateInput(**SAMPLE_CANDIDATE).model_dump(exclude={"user_id"})
+
+        async def burst():
+            return await asyncio.gather(*(main._enhance_summary(dict(candidate), "fallback") for _ in range(3)))
+
+        assert asyncio.run(burst()) == ["Enhanced summary."] * 3
+        assert mock_client.chat.completions.create.await_count == 1
+        assert main._inflight_completions == {}
+
+    def test_enhancement_leads_with_static_system_prompt(self, monkeypatch):
+        from prompts import PROMPT_CACHE_KEY_DRAFT, SYSTEM_PROMPT_DRAFT
+        mock_client = _mock_openai_client(monkeypatch, content="Enhanced summary.")
+
+        resp = client.post("/api/generate-resume", json=SAMPLE_CANDIDATE)
+        assert resp.status_code == 200
+        kwargs = mock_client.chat.completions.create.await_args.kwargs
+        assert kwargs["messages"][0] == {"role": "system", "content": SYSTEM_PROMPT_DRAFT}
+        assert SAMPLE_CANDIDATE["name"] not in SYSTEM_PROMPT_DRAFT
+        assert SAMPLE_CANDIDATE["name"] in kwargs["messages"][1]["content"]
+        assert kwargs["prompt_cache_key"] == PROMPT_CACHE_KEY_DRAFT
+
+    def test_background_enhancement_updates_saved_resume(self, monkeypatch):
+        _mock_openai_client(monkeypatch, content="Background enhanced summary.")
+
+        candidate = {**SAMPLE_CANDIDATE, "professional_summary": "Summary awaiting background enhancement."}
+        resp = client.post("/api/generate-resume?enhance=background", json=candidate)
+        assert resp.status_code == 200
+        data = resp.json()["data"]
+        assert data["summary_status"] == "pending"
+        assert isinstance(data["resume_id"], int)
+
+        # TestClient runs background tasks before returning the response
+        summary = client.get(data["summary_url"]).json()
+        assert summary == {
+            "resume_id": data["resume_id"],
+            "status": "ready",
+            "professional_summary": "Background enhanced summary.",
+        }
+        assert client.get(data["download_url"]).status_code == 200
+
+    def test_failed_background_rebuild_leaves_no_temp_file(self, monkeypatch, tmp_path):
+        import main
+        _mock_openai_client(monkeypatch, content="Summary kept as submitted.")
+        candidate = {**SAMPLE_CANDIDATE, "professional_summary": "Summary kept as submitted."}
+        data = client.post("/api/generate-resume?enhance=background", json=candidate).json()["data"]
+        monkeypatch.setattr("main.RESUMES_DIR", tmp_path)
+
+        def partial_build(output_path, *args, **kwargs):
+            Path(output_path).write_bytes(b"PK\x03\x04partial")
+            raise RuntimeError("builder crashed")
+
+        with patch("main.ResumeBuilder.build_word_document", side_effect=partial_build):
+            with pytest.raises(RuntimeError):
+                main._store_enhanced_summary(data["resume_id"], dict(candidate), "A different summary.")
+        assert list(tmp_path.iterdir()) == []
+        assert client.get(data["summary_url"]).json()["status"] == "ready"
+
+    def test_candidate_prompt_lists_every_section(self):
+        from prompts import create_resume_prompt
+        prompt = create_resume_prompt({
+            "name": "Jane", "contact": {"email": "j@x.com"}, "summary": "Engineer.",
+            "key_skills": ["Python"],
+            "experience": [{"title": "Dev", "company": "Acme", "dates": "2020", "bullets": ["Shipped", "Led"]}],
+            "education": [{"degree": "BSc", "institution": "Uni", "graduation_year": "2018"}],
+            "technical_skills": {"Languages": ["Python", "Go"]},
+        })
+        assert prompt.startswith("Generate a professional resume for the following candidate:\n\nName: Jane\n")
+        assert "Phone: N/A\n" in prompt
+        assert "- Dev at Acme, N/A\n  Dates: 2020\n  Achievements:\n  • Shipped\n  • Led\n" in prompt
+        assert "\nEducation:\n- BSc from Uni (2018)\n" in prompt
+        assert prompt.endswith("\nTechnical Skills: Languages: Python, Go\n")
+        assert "Certifications" not in prompt
+
+    def test_saved_candidate_sections_match_request(self, monkeypatch):
+        import orjson
+        from database import SessionLocal
+        from models import Resume
+        monkeypatch.setattr("main.openai_client", None)
+        resp = client.post("/api/generate-resume?enhance=background", json=SAMPLE_CANDIDATE)
+        resume_id = resp.json()["data"]["resume_id"]
+        with SessionLocal() as db:
+            saved = db.get(Resume, resume_id)
+            contact = orjson.loads(saved.contact_info)
+            experience = orjson.loads(saved.experience)
+            education = orjson.loads(saved.education)
+        assert contact["email"] == SAMPLE_CANDIDATE["contact"]["email"]
+        assert [e["company"] for e in experience] == [e["company"] for e in SAMPLE_CANDIDATE["experience"]]
+        assert [e["degree"] for e in education] == [e["degree"] for e in SAMPLE_CANDIDATE["education"]]
+
+    def test_saved_skills_flatten_categorised_technical_skills(self, monkeypatch):
+        import orjson
+        from database import SessionLocal
+        from models import Resume
+        monkeypatch.setattr("main.openai_client", None)
+        candidate = {**SAMPLE_CANDIDATE, "technical_skills": {"Languages": ["Python", "Go"], "Tools": ["Docker"]}}
+        resp = client.post("/api/generate-resume?enhance=background", json=candidate)
+        assert resp.status_code == 200
+        with SessionLocal() as db:
+            skills = orjson.loads(db.get(Resume, resp.json()["data"]["resume_id"]).skills)
+        assert skills == ["Testing", "Automation", "Python", "Go", "Docker"]
+
+    def test_invalid_enhance_mode_returns_400(self):
+        resp = client.post("/api/generate-resume?enhance=later", json=SAMPLE_CANDIDATE)
+        assert resp.status_code == 400
+
+    def test_summary_for_unknown_resume_returns_404(self):
+        assert client.get("/api/resumes/999999999/summary").status_code == 404
+
+    def test_summary_is_only_visible_to_the_resume_owner(self, monkeypatch):
+        _mock_openai_client(monkeypatch, content="Owner-only summary.")
+        owner_id = _signup_user("summary_owner")
+        data = client.post(
+            "/api/generate-resume?enhance=background", json={**SAMPLE_CANDIDATE, "user_id": owner_id}
+        ).json()["data"]
+        assert data["summary_url"].endswith(f"?user_id={owner_id}")
+        assert client.get(data["summary_url"]).json()["professional_summary"] == "Owner-only summary."
+
+        path = f"/api/resumes/{data['resume_id']}/summary"
+        assert client.get(path).status_code == 404
+        assert client.get(f"{path}?user_id={_signup_user('summary_other')}").status_code == 404
+
+    def test_respaced_candidate_reuses_enhanced_summary(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch, content="Enhanced summary.")
+
+        respaced = {**SAMPLE_CANDIDATE, "professional_summary": "  Test candidate for\n automated   testing purposes. "}
+        for candidate in (SAMPLE_CANDIDATE, respaced):
+            resp = client.post("/api/generate-resume", json=candidate)
+            assert resp.status_code == 200
+        assert mock_client.chat.completions.create.await_count == 1
+
+
+class TestGenerateResumeBulk:
+    def test_bulk_generates_each_candidate(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch, content="Enhanced summary.")
+
+        second = {**SAMPLE_CANDIDATE, "name": "Second Candidate"}
+        resp = client.post("/api/generate-resume/bulk", json=[SAMPLE_CANDIDATE, second])
+        assert resp.status_code == 200
+        data = resp.json()["data"]
+        assert [d["name"] for d in data] == [SAMPLE_CANDIDATE["name"], "Second Candidate"]
+        assert all(d["filename"].endswith(".docx") for d in data)
+        assert mock_client.chat.completions.create.await_count == 2
+
+    def test_bulk_rejects_empty_list(self):
+        resp = client.post("/api/generate-resume/bulk", json=[])
+        assert resp.status_code == 400
+
+    def test_bulk_rejects_too_many(self):
+        from main import MAX_BULK_CANDIDATES
+        resp = client.post("/api/generate-resume/bulk", json=[SAMPLE_CANDIDATE] * (MAX_BULK_CANDIDATES + 1))
+        assert resp.status_code == 400
+
 
 # ── Download endpoint ────────────────────────────────────────────────────────
 
@@ -226,6 +514,34 @@ class TestDownloadResume:
         resp = client.get("/api/resumes/download-file/does_not_exist_xyz.docx")
         assert resp.status_code == 404
 
+    def test_download_legacy_filenames_outside_whitelist(self):
+        from main import RESUMES_DIR
+        for name in ("resume_legacy_O'Brien,_Jr.docx", "resume_legacy_José.docx"):
+            (RESUMES_DIR / name).write_bytes(b"PK\x03\x04legacy")
+            try:
+                resp = client.get(f"/api/resumes/download-file/{name}")
+                assert resp.status_code == 200, name
+                assert resp.content == b"PK\x03\x04legacy"
+            finally:
+                (RESUMES_DIR / name).unlink()
+
+    def test_download_stats_file_once(self):
+        data = client.post("/api/generate-resume", json=SAMPLE_CANDIDATE).json()["data"]
+        real_stat = os.stat
+        with patch("os.stat", side_effect=real_stat) as mock_stat:
+            dl_resp = client.get(f"/api/resumes/download-file/{data['filename']}")
+        assert dl_resp.status_code == 200
+        assert dl_resp.headers["content-length"] == str(Path(data["file_path"]).stat().st_size)
+        file_stats = [c for c in mock_stat.call_args_list if str(c.args[0]).endswith(data["filename"])]
+        assert len(file_stats) == 1
+
+    def test_download_by_id_with_missing_file_returns_404(self, monkeypatch):
+        monkeypatch.setattr("main.openai_client", None)
+        data = client.post("/api/generate-resume?enhance=background", json=SAMPLE_CANDIDATE).json()["data"]
+        os.remove(data["file_path"])
+        resp = client.get(f"/api/resumes/{data['resume_id']}/download")
+        assert resp.status_code == 404
+
 
 # ── Templates endpoint ───────────────────────────────────────────────────────
 
@@ -275,17 +591,23 @@ class TestTemplates:
         resp = client.get("/api/templates/previews")
         assert "serif" in resp.json()["classic"].lower()
 
+    def test_template_previews_rendered_once(self):
+        import main
+        main._render_template_previews.cache_clear()
+        with patch("main.ResumeBuilder.build_html_preview", return_value="<html/>") as mock_preview:
+            first = client.get("/api/templates/previews").json()
+            second = client.get("/api/templates/previews").json()
+        main._render_template_previews.cache_clear()
+        assert first == second
+        assert mock_preview.call_count == 5
+
 
 class TestGenerateWithTemplate:
     """Tests for the `template` parameter in POST /api/generate."""
 
     @pytest.mark.parametrize("template_id", ["modern", "classic", "creative", "minimal"])
     def test_generate_with_each_template(self, monkeypatch, template_id):
-        mock_client = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-        mock_client.chat.completions.create.return_value = mock_resp
-        monkeypatch.setattr("main.openai_client", mock_client)
+        _mock_openai_client(monkeypatch)
 
         txt = b"Jane Smith\nSoftware Engineer"
         resp = client.post(
@@ -300,11 +622,7 @@ class TestGenerateWithTemplate:
 
     def test_generate_without_template_defaults_to_modern(self, monkeypatch):
         """Omitting the template field must not cause an error (defaults to modern)."""
-        mock_client = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-        mock_client.chat.completions.create.return_value = mock_resp
-        monkeypatch.setattr("main.openai_client", mock_client)
+        _mock_openai_client(monkeypatch)
 
         txt = b"Jane Smith\nSoftware Engineer"
         resp = client.post(
@@ -316,11 +634,7 @@ class TestGenerateWithTemplate:
 
     def test_generate_unknown_template_falls_back_gracefully(self, monkeypatch):
         """An unknown template ID must not crash — it falls back to modern."""
-        mock_client = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-        mock_client.chat.completions.create.return_value = mock_resp
-        monkeypatch.setattr("main.openai_client", mock_client)
+        _mock_openai_client(monkeypatch)
 
         txt = b"Jane Smith\nSoftware Engineer"
         resp = client.post(
@@ -331,11 +645,7 @@ class TestGenerateWithTemplate:
         assert resp.status_code == 200
 
     def test_creative_template_preview_contains_purple(self, monkeypatch):
-        mock_client = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-        mock_client.chat.completions.create.return_value = mock_resp
-        monkeypatch.setattr("main.openai_client", mock_client)
+        _mock_openai_client(monkeypatch)
 
         txt = b"Jane Smith\nSoftware Engineer"
         resp = client.post(
@@ -348,11 +658,7 @@ class TestGenerateWithTemplate:
         assert "#6b21a8" in resp.json()["preview_html"]
 
     def test_classic_template_preview_contains_serif_font(self, monkeypatch):
-        mock_client = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-        mock_client.chat.completions.create.return_value = mock_resp
-        monkeypatch.setattr("main.openai_client", mock_client)
+        _mock_openai_client(monkeypatch)
 
         txt = b"Jane Smith\nSoftware Engineer"
         resp = client.post(
@@ -374,6 +680,118 @@ class TestResumesList:
         assert data["status"] == "success"
         assert data["resumes"] == []
 
+    def test_list_response_skips_jsonable_encoder(self):
+        with patch("fastapi.routing.jsonable_encoder") as mock_encoder:
+            resp = client.get("/api/resumes?user_id=99999")
+        assert resp.status_code == 200
+        assert resp.content.startswith(b'{"status":"success","resumes":[]')
+        mock_encoder.assert_not_called()
+
+    def test_get_resumes_lists_saved_resume_with_filename(self):
+        user_id = _signup_user("list")
+        gen = client.post("/api/generate-resume", json={**SAMPLE_CANDIDATE, "user_id": user_id})
+        filename = gen.json()["data"]["filename"]
+
+        resp = client.get(f"/api/resumes?user_id={user_id}")
+        assert resp.status_code == 200
+        resumes = resp.json()["resumes"]
+        assert [r["filename"] for r in resumes] == [filename]
+
+    def test_get_resumes_paginates_with_total(self):
+        user_id = _signup_user("page")
+        for _ in range(3):
+            client.post("/api/generate-resume", json={**SAMPLE_CANDIDATE, "user_id": user_id})
+
+        all_ids = [r["id"] for r in client.get(f"/api/resumes?user_id={user_id}").json()["resumes"]]
+        page = client.get(f"/api/resumes?user_id={user_id}&skip=1&limit=1").json()
+        assert page["total"] == 3
+        assert [r["id"] for r in page["resumes"]] == all_ids[1:2]
+
+        past_end = client.get(f"/api/resumes?user_id={user_id}&skip=10&limit=5").json()
+        assert past_end["resumes"] == []
+        assert past_end["total"] == 3
+
+    def test_timestamps_are_generated_by_the_database(self):
+        user_id = _signup_user("stamp")
+        with _captured_sql() as statements:
+            client.post("/api/generate-resume", json={**SAMPLE_CANDIDATE, "user_id": user_id})
+        inserts = [(sql, params) for sql, params in statements if sql.startswith("INSERT INTO resumes")]
+        assert len(inserts) == 1
+        statement, parameters = inserts[0]
+        assert statement.count("CURRENT_TIMESTAMP") == 2
+        assert not any(hasattr(p, "isoformat") for p in parameters)
+        listed = client.get(f"/api/resumes?user_id={user_id}").json()["resumes"]
+        assert listed[0]["created_at"]
+
+    def test_timestamps_stay_utc_on_postgresql(self):
+        from sqlalchemy.dialects import postgresql
+        from sqlalchemy.schema import CreateTable
+        from models import Resume
+        ddl = str(CreateTable(Resume.__table__).compile(dialect=postgresql.dialect()))
+        assert ddl.count("DEFAULT timezone('utc', now())") == 2
+        assert "DEFAULT now()" not in ddl
+
+    def test_saving_resume_returns_id_without_refetch(self, monkeypatch):
+        monkeypatch.setattr("main.openai_client", None)
+        with _captured_sql() as statements:
+            resp = client.post("/api/generate-resume?enhance=background", json=SAMPLE_CANDIDATE)
+        assert isinstance(resp.json()["data"]["resume_id"], int)
+        inserts = [sql for sql, _ in statements if sql.startswith("INSERT INTO resumes")]
+        assert len(inserts) == 1 and "RETURNING" in inserts[0]
+        # Only the background summary task reads the row back
+        assert sum("FROM resumes" in sql for sql, _ in statements) == 1
+
+    def test_get_resumes_selects_only_listed_columns(self):
+        with _captured_sql() as statements:
+            resp = client.get("/api/resumes?user_id=1")
+        assert resp.status_code == 200
+        list_sql = [sql for sql, _ in statements if "FROM resumes" in sql]
+        assert list_sql
+        assert not any("resume_data" in sql or "preview_html" in sql for sql in list_sql)
+
+    def test_get_resumes_lists_newest_first_via_index(self):
+        from sqlalchemy import text
+        from database import engine
+        user_id = _signup_user("order")
+        created = [
+            client.post("/api/generate-resume", json={**SAMPLE_CANDIDATE, "user_id": user_id}).json()["data"]["resume_id"]
+            for _ in range(2)
+        ]
+        listed = [r["id"] for r in client.get(f"/api/resumes?user_id={user_id}").json()["resumes"]]
+        assert listed == created[::-1]
+
+        with engine.connect() as conn:
+            plan = conn.execute(text(
+                "EXPLAIN QUERY PLAN SELECT id FROM resumes WHERE user_id = :uid ORDER BY created_at DESC"
+            ), {"uid": user_id}).all()
+        assert any("ix_resumes_user_created" in row[-1] for row in plan)
+
+
+class TestUploadResume:
+    def test_identical_uploads_are_stored_once(self):
+        import uuid
+        from main import UPLOAD_DIR
+        content = f"Resume {uuid.uuid4().hex}".encode()
+        first = client.post("/api/upload-resume", files={"file": ("a.txt", io.BytesIO(content), "text/plain")})
+        second = client.post("/api/upload-resume", files={"file": ("b.txt", io.BytesIO(content), "text/plain")})
+        assert first.status_code == second.status_code == 200
+        a, b = first.json(), second.json()
+        # Whether someone else already uploaded these bytes is not disclosed
+        assert "duplicate" not in a and "duplicate" not in b
+        assert a["stored_filename"] == b["stored_filename"]
+        assert (UPLOAD_DIR / a["stored_filename"]).read_bytes() == content
+        assert b["filename"] == "b.txt"
+
+    def test_multi_buffer_upload_is_written_intact(self):
+        import os
+        from main import UPLOAD_DIR, UPLOAD_WRITE_BUFFER
+        content = b"%PDF-1.4\n" + os.urandom(2 * UPLOAD_WRITE_BUFFER + 12345)
+        resp = client.post("/api/upload-resume", files={"file": ("big.pdf", io.BytesIO(content), "application/pdf")})
+        assert resp.status_code == 200
+        data = resp.json()
+        assert data["file_size"] == len(content)
+        assert (UPLOAD_DIR / data["stored_filename"]).read_bytes() == content
+
 
 # ── /api/generate (document-based AI generation) ────────────────────────────
 
@@ -412,19 +830,24 @@ MOCK_RESUME_JSON = {
 }
 
 
-def _mock_openai_client(monkeypatch):
-    """Return a mocked openai_client and patch it into main module."""
-    mock_client = MagicMock()
-    mock_response = MagicMock()
-    mock_response.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-    mock_client.chat.completions.create.return_value = mock_response
-    monkeypatch.setattr("main.openai_client", mock_client)
-    return mock_client
-
-
 class TestGenerateFromDocuments:
     """Tests for POST /api/generate — document-based AI resume generation."""
 
+    def test_generate_prompt_section_layout(self):
+        from prompts import build_generate_prompt
+        prompt = build_generate_prompt("--- cv.txt ---\nJane", " Python developer ", " Led migration ")
+        sections = prompt.split("\n\n")
+        assert sections[0].startswith("GENERATION MODE: Minimal JD mode")
+        assert sections[1] == "=== CANDIDATE DOCUMENTS ===\n--- cv.txt ---\nJane"
+        assert sections[2] == "=== JOB DESCRIPTION ===\nPython developer"
+        assert sections[3].startswith("=== ADDITIONAL INFORMATION ===\n")
+        assert sections[4] == "Led migration"
+        assert sections[5].startswith("Generate the resume JSON now.")
+
+        general = build_generate_prompt("docs", "", "")
+        assert "=== JOB DESCRIPTION ===" not in general
+        assert "=== ADDITIONAL INFORMATION ===" not in general
+
     def test_generate_without_files_returns_error(self):
         # No files provided → endpoint must not return 200.
         # FastAPI may return 422 (form validation) or the endpoint returns 400.
@@ -557,11 +980,7 @@ class TestGenerateFromDocuments:
         assert "maximum" in resp.json()["detail"].lower()
 
     def test_generate_openai_json_error_returns_500(self, monkeypatch):
-        mock_client = MagicMock()
-        mock_response = MagicMock()
-        mock_response.choices[0].message.content = "This is not JSON at all"
-        mock_client.chat.completions.create.return_value = mock_response
-        monkeypatch.setattr("main.openai_client", mock_client)
+        _mock_openai_client(monkeypatch, content="This is not JSON at all")
 
         txt = b"Jane Smith\nSoftware Engineer"
         resp = client.post(
@@ -571,6 +990,147 @@ class TestGenerateFromDocuments:
         )
         assert resp.status_code == 500
 
+    def test_generate_keeps_upload_order_in_prompt(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch)
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer"},
+            files=[
+                ("files", ("first.txt", io.BytesIO(b"First document"), "text/plain")),
+                ("files", ("second.txt", io.BytesIO(b"Second document"), "text/plain")),
+            ],
+        )
+        assert resp.status_code == 200
+        user_prompt = mock_client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+        assert user_prompt.index("--- first.txt ---") < user_prompt.index("--- second.txt ---")
+
+    def test_generate_requests_strict_schema_and_maps_skill_categories(self, monkeypatch):
+        from prompts import RESUME_JSON_SCHEMA
+        structured = {
+            **MOCK_RESUME_JSON,
+            "technical_skills": [{"category": "Languages", "items": ["Python", "SQL"]}],
+        }
+        mock_client = _mock_openai_client(monkeypatch)
+        mock_client.chat.completions.create.return_value.choices[0].message.content = json.dumps(structured)
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Structured output engineer"},
+            files=[("files", ("cv.txt", io.BytesIO(b"Jane Smith\nSchema"), "text/plain"))],
+        )
+        assert resp.status_code == 200
+        assert resp.json()["data"]["technical_skills"] == {"Languages": ["Python", "SQL"]}
+        response_format = mock_client.chat.completions.create.call_args.kwargs["response_format"]
+        assert response_format["type"] == "json_schema"
+        assert response_format["json_schema"]["strict"] is True
+
+        def assert_strict(schema):
+            if schema.get("type") == "object":
+                assert schema["additionalProperties"] is False
+                assert set(schema["required"]) == set(schema["properties"])
+                for child in schema["properties"].values():
+                    assert_strict(child)
+            elif schema.get("type") == "array":
+                assert_strict(schema["items"])
+        assert_strict(RESUME_JSON_SCHEMA)
+
+    def test_system_prompt_describes_schema_technical_skills_shape(self):
+        from prompts import SYSTEM_PROMPT_GENERATE
+        assert '{"category": "Platforms", "items": ["item1", "item2"]}' in SYSTEM_PROMPT_GENERATE
+        assert "OBJECT with category label keys" not in SYSTEM_PROMPT_GENERATE
+
+    def test_model_without_structured_outputs_falls_back_to_json_mode(self, monkeypatch):
+        import httpx
+        from openai import BadRequestError
+        monkeypatch.setattr("main._models_without_json_schema", set())
+        request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+        rejected = BadRequestError(
+            "Invalid parameter: 'response_format' of type 'json_schema' is not supported with this model.",
+            response=httpx.Response(400, request=request),
+            body={"param": "response_format"},
+        )
+        ok = _chat_response(json.dumps(MOCK_RESUME_JSON))
+        mock_client = _mock_openai_client(monkeypatch, side_effect=[rejected, ok, ok])
+
+        for txt in (b"Jane Smith\nLegacy model", b"Jane Smith\nLegacy model again"):
+            resp = client.post(
+                "/api/generate",
+                data={"job_description": "Python developer"},
+                files=[("files", ("cv.txt", io.BytesIO(txt), "text/plain"))],
+            )
+            assert resp.status_code == 200
+        formats = [c.kwargs["response_format"]["type"] for c in mock_client.chat.completions.create.call_args_list]
+        # The second request skips the json_schema attempt the model already refused
+        assert formats == ["json_schema", "json_object", "json_object"]
+
+    def test_generate_openai_timeout_returns_504(self, monkeypatch):
+        async def _slow_completion(**kwargs):
+            await asyncio.sleep(1)
+
+        _mock_openai_client(monkeypatch, side_effect=_slow_completion)
+        monkeypatch.setattr("main.OPENAI_TIMEOUT", 0.01)
+
+        txt = b"Jane Smith\nSoftware Engineer"
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer"},
+            files=[("files", ("cv.txt", io.BytesIO(txt), "text/plain"))],
+        )
+        assert resp.status_code == 504
+
+    def test_identical_generate_requests_call_openai_once(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch)
+        txt = b"Jane Smith\nSoftware Engineer"
+        ids = set()
+        for _ in range(2):
+            resp = client.post(
+                "/api/generate",
+                data={"job_description": "Python developer"},
+                files=[("files", ("cv.txt", io.BytesIO(txt), "text/plain"))],
+            )
+            assert resp.status_code == 200
+            ids.add(resp.json()["resume_id"])
+        assert mock_client.chat.completions.create.await_count == 1
+        assert len(ids) == 2
+
+    def test_generate_oversize_document_returns_413(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch)
+        monkeypatch.setattr("main.MAX_FILE_SIZE", 1024)
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer"},
+            files=[("files", ("cv.txt", io.BytesIO(b"x" * 4096), "text/plain"))],
+        )
+        assert resp.status_code == 413
+        mock_client.chat.completions.create.assert_not_called()
+
+    def test_generate_openai_rate_limit_returns_429(self, monkeypatch):
+        mock_client = _mock_openai_client(monkeypatch, side_effect=_rate_limit_error())
+        monkeypatch.setattr("main.OPENAI_RETRY_BASE_DELAY", 0)
+
+        txt = b"Jane Smith\nSoftware Engineer"
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer"},
+            files=[("files", ("cv.txt", io.BytesIO(txt), "text/plain"))],
+        )
+        assert resp.status_code == 429
+        assert mock_client.chat.completions.create.await_count == 4
+
+    def test_generate_retries_after_rate_limit(self, monkeypatch):
+        mock_client = _mock_openai_client(
+            monkeypatch,
+            side_effect=[_rate_limit_error(), _chat_response(json.dumps(MOCK_RESUME_JSON))],
+        )
+        monkeypatch.setattr("main.OPENAI_RETRY_BASE_DELAY", 0)
+
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer"},
+            files=[("files", ("cv.txt", io.BytesIO(b"Jane Smith"), "text/plain"))],
+        )
+        assert resp.status_code == 200
+        assert mock_client.chat.completions.create.await_count == 2
+
     def test_generate_always_returns_resume_id(self, monkeypatch):
         """Even for guests (no user_id), the generate endpoint must return a resume_id."""
         _mock_openai_client(monkeypatch)
@@ -585,9 +1145,222 @@ class TestGenerateFromDocuments:
         assert data["resume_id"] is not None
         assert isinstance(data["resume_id"], int)
 
+    def test_generate_commits_off_the_event_loop(self, monkeypatch):
+        import main
+        _mock_openai_client(monkeypatch)
+        insert = main._insert_resume
+        on_loop = []
+
+        def recording_insert(db, **values):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return insert(db, **values)
+
+        monkeypatch.setattr("main._insert_resume", recording_insert)
+        resp = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer"},
+            files=[("files", ("cv.txt", io.BytesIO(b"Jane Smith\nThreaded commit"), "text/plain"))],
+        )
+        assert resp.status_code == 200
+        assert isinstance(resp.json()["resume_id"], int)
+        assert on_loop == [False]
+
+
+# ── Batch-priority generation ────────────────────────────────────────────────
+
+class TestBatchGeneration:
+    """POST /api/generate with priority=batch and the batch poll endpoint."""
+
+    def _mock_batch_client(self, monkeypatch, batch_id):
+        mock_client = MagicMock()
+        mock_client.files.create = AsyncMock(return_value=MagicMock(id="file-in"))
+        mock_client.batches.create = AsyncMock(return_value=MagicMock(id=batch_id))
+        monkeypatch.setattr("main.openai_client", mock_client)
+        return mock_client
+
+    def _queue(self, template="modern", **extra):
+        return client.post(
+            "/api/generate",
+            data={"job_description": "Python developer", "priority": "batch", "template": template, **extra},
+            files=[("files", ("cv.txt", io.BytesIO(b"Jane Smith\nSoftware Engineer"), "text/plain"))],
+        )
+
+    def test_invalid_priority_rejected(self):
+        resp = client.post(
+            "/api/generate",
+            data={"priority": "urgent"},
+            files=[("files", ("cv.txt", io.BytesIO(b"Jane"), "text/plain"))],
+        )
+        assert resp.status_code == 400
+
+    def test_batch_priority_queues_without_sync_completion(self, monkeypatch):
+        mock_client = self._mock_batch_client(monkeypatch, "batch_queue_only")
+        resp = self._queue()
+        assert resp.status_code == 202
+        data = resp.json()
+        assert data["status"] == "queued"
+        assert data["batch_id"] == "batch_queue_only"
+        assert isinstance(data["resume_id"], int)
+        mock_client.chat.completions.create.assert_not_called()
+        _, kwargs = mock_client.batches.create.call_args
+        assert kwargs["endpoint"] == "/v1/chat/completions"
+
+    def test_poll_pending_then_completed(self, monkeypatch):
+        import uuid
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        mock_client = self._mock_batch_client(monkeypatch, batch_id)
+        resume_id = self._queue(template="classic").json()["resume_id"]
+
+        mock_client.batches.retrieve = AsyncMock(
+            return_value=MagicMock(status="in_progress", output_file_id=None)
+        )
+        pending = client.get(f"/api/generate/batch/{batch_id}")
+        assert pending.status_code == 202
+        assert pending.json()["status"] == "in_progress"
+
+        queued = json.loads(mock_client.files.create.call_args.kwargs["file"][1])
+        output_line = json.dumps({"custom_id": queued["custom_id"], "response": {"status_code": 200, "body": {
+            "choices": [{"message": {"content": json.dumps(MOCK_RESUME_JSON)}}]
+        }}})
+        mock_client.batches.retrieve = AsyncMock(
+            return_value=MagicMock(status="completed", output_file_id="file-out")
+        )
+        mock_client.files.content = AsyncMock(return_value=MagicMock(text=output_line + "\n"))
+        done = client.get(f"/api/generate/batch/{batch_id}")
+        assert done.status_code == 200
+        data = done.json()
+        assert data["resume_id"] == resume_id
+        assert data["data"]["name"] == MOCK_RESUME_JSON["name"]
+        assert data["filename"].endswith(".docx")
+
+        dl = client.get(data["download_url"])
+        assert dl.status_code == 200
+
+        # The batch result now answers an identical sync request
+        sync = client.post(
+            "/api/generate",
+            data={"job_description": "Python developer", "template": "classic"},
+            files=[("files", ("cv.txt", io.BytesIO(b"Jane Smith\nSoftware Engineer"), "text/plain"))],
+        )
+        assert sync.status_code == 200
+        mock_client.chat.completions.create.assert_not_called()
+
+    def test_completed_batch_without_output_returns_502(self, monkeypatch):
+        import uuid
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        mock_client = self._mock_batch_client(monkeypatch, batch_id)
+        self._queue()
+        mock_client.batches.retrieve = AsyncMock(return_value=MagicMock(
+            status="completed", output_file_id=None, error_file_id="file-err"
+        ))
+        mock_client.files.content = AsyncMock(return_value=MagicMock(text='{"error": {"code": "bad"}}\n'))
+        resp = client.get(f"/api/generate/batch/{batch_id}")
+        assert resp.status_code == 502
+        mock_client.files.content.assert_awaited_once_with("file-err")
+
+    def test_unparseable_batch_output_returns_502(self, monkeypatch):
+        import uuid
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        mock_client = self._mock_batch_client(monkeypatch, batch_id)
+        self._queue()
+        mock_client.batches.retrieve = AsyncMock(
+            return_value=MagicMock(status="completed", output_file_id="file-out")
+        )
+        mock_client.files.content = AsyncMock(return_value=MagicMock(text="not json\n"))
+        resp = client.get(f"/api/generate/batch/{batch_id}")
+        assert resp.status_code == 502
+
+    def test_batch_is_only_pollable_by_its_owner(self, monkeypatch):
+        import uuid
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        mock_client = self._mock_batch_client(monkeypatch, batch_id)
+        owner_id = _signup_user("batch_owner")
+        queued = self._queue(user_id=owner_id).json()
+        assert queued["poll_url"] == f"/api/generate/batch/{batch_id}?user_id={owner_id}"
+        mock_client.batches.retrieve = AsyncMock(
+            return_value=MagicMock(status="in_progress", output_file_id=None)
+        )
+
+        assert client.get(queued["poll_url"]).status_code == 202
+        assert client.get(f"/api/generate/batch/{batch_id}").status_code == 404
+        other = client.get(f"/api/generate/batch/{batch_id}?user_id={_signup_user('batch_other')}")
+        assert other.status_code == 404
+
+    def test_poll_unknown_batch_returns_404(self):
+        resp = client.get("/api/generate/batch/batch_does_not_exist")
+        assert resp.status_code == 404
+
 
 # ── Guest editing ─────────────────────────────────────────────────────────────
 
+class TestGenerateStream:
+    """POST /api/generate/stream relays the completion as server-sent events."""
+
+    def _mock_stream_client(self, monkeypatch, pieces):
+        async def stream():
+            for piece in pieces:
+                chunk = MagicMock()
+                chunk.choices[0].delta.content = piece
+                yield chunk
+
+        mock_client = _mock_openai_client(monkeypatch, side_effect=lambda **kwargs: stream())
+        return mock_client
+
+    def _events(self, resp):
+        events = []
+        for block in resp.text.strip().split("\n\n"):
+            event_line, data_line = block.split("\n")
+            events.append((event_line[len("event: "):], json.loads(data_line[len("data: "):])))
+        return events
+
+    def _post(self, content=b"Jane Smith\nStreaming Engineer"):
+        return client.post(
+            "/api/generate/stream",
+            data={"job_description": "Python developer"},
+            files=[("files", ("cv.txt", io.BytesIO(content), "text/plain"))],
+        )
+
+    def test_streams_deltas_then_done(self, monkeypatch):
+        body = json.dumps(MOCK_RESUME_JSON)
+        mock_client = self._mock_stream_client(monkeypatch, [body[:20], body[20:]])
+        resp = self._post()
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/event-stream")
+        events = self._events(resp)
+        assert [name for name, _ in events] == ["delta", "delta", "done"]
+        assert "".join(data["content"] for name, data in events if name == "delta") == body
+        done = events[-1][1]
+        assert done["data"]["name"] == "Jane Smith"
+        assert isinstance(done["resume_id"], int)
+        assert done["download_url"].endswith(done["filename"])
+        assert mock_client.chat.completions.create.call_args.kwargs["stream"] is True
+
+    def test_invalid_json_ends_with_error_event(self, monkeypatch):
+        self._mock_stream_client(monkeypatch, ["not", " json"])
+        resp = self._post(b"Jane Smith\nBroken Stream")
+        events = self._events(resp)
+        name, data = events[-1]
+        assert name == "error"
+        assert data["status_code"] == 500
+
+    def test_failed_save_ends_with_error_event(self, monkeypatch):
+        body = json.dumps(MOCK_RESUME_JSON)
+        self._mock_stream_client(monkeypatch, [body])
+        with patch("main._render_generated_resume", side_effect=OSError("No space left on device")):
+            resp = self._post(b"Jane Smith\nDisk Full")
+        events = self._events(resp)
+        assert [name for name, _ in events] == ["delta", "error"]
+        assert events[-1][1]["status_code"] == 500
+
+    def test_missing_files_is_a_plain_http_error(self):
+        resp = client.post("/api/generate/stream", data={"job_description": "Python developer"})
+        assert resp.status_code == 400
+
+
 class TestGuestEditing:
     """Guest users (no user_id) can edit up to MAX_PROMPTS_GUEST times."""
 
@@ -602,16 +1375,9 @@ class TestGuestEditing:
         assert resp.status_code == 200
         return resp.json()["resume_id"]
 
-    def _mock_edit_openai(self, monkeypatch):
-        mock_client = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.choices[0].message.content = json.dumps(MOCK_RESUME_JSON)
-        mock_client.chat.completions.create.return_value = mock_resp
-        monkeypatch.setattr("main.openai_client", mock_client)
-
     def test_guest_can_edit_without_user_id(self, monkeypatch):
         resume_id = self._generate_guest_resume(monkeypatch)
-        self._mock_edit_openai(monkeypatch)
+        _mock_openai_client(monkeypatch)
         resp = client.post(
             f"/api/resumes/{resume_id}/edit",
             data={"prompt": "Make the summary shorter"},
@@ -622,9 +1388,33 @@ class TestGuestEditing:
         assert "preview_html" in data
         assert "remaining_prompts" in data
 
+    def test_edit_prompt_keeps_static_prefix_and_request_last(self, monkeypatch):
+        from prompts import EDIT_INSTRUCTIONS, SYSTEM_MESSAGE_GENERATE, SYSTEM_PROMPT_GENERATE
+        resume_id = self._generate_guest_resume(monkeypatch)
+        mock_client = _mock_openai_client(monkeypatch)
+        resp = client.post(
+            f"/api/resumes/{resume_id}/edit",
+            data={"prompt": "Mention the $2M budget"},
+        )
+        assert resp.status_code == 200
+        messages = mock_client.chat.completions.create.await_args.kwargs["messages"]
+        assert messages[0] is SYSTEM_MESSAGE_GENERATE
+        assert messages[0]["content"] == SYSTEM_PROMPT_GENERATE
+        assert messages[1]["content"].startswith(EDIT_INSTRUCTIONS)
+        assert messages[1]["content"].endswith("Mention the $2M budget")
+
+
+    def test_edit_prompt_embeds_compact_resume_json(self, monkeypatch):
+        resume_id = self._generate_guest_resume(monkeypatch)
+        mock_client = _mock_openai_client(monkeypatch)
+        client.post(f"/api/resumes/{resume_id}/edit", data={"prompt": "Shorten it"})
+        user_msg = mock_client.chat.completions.create.await_args.kwargs["messages"][1]["content"]
+        compact = json.dumps(MOCK_RESUME_JSON, separators=(",", ":"), ensure_ascii=False)
+        assert compact in user_msg
+
     def test_guest_edit_decrements_remaining_prompts(self, monkeypatch):
         resume_id = self._generate_guest_resume(monkeypatch)
-        self._mock_edit_openai(monkeypatch)
+        _mock_openai_client(monkeypatch)
         resp = client.post(
             f"/api/resumes/{resume_id}/edit",
             data={"prompt": "Add more skills"},
@@ -640,7 +1430,7 @@ class TestGuestEditing:
         """After MAX_PROMPTS_GUEST edits the endpoint returns 403."""
         from utils import MAX_PROMPTS_GUEST
         resume_id = self._generate_guest_resume(monkeypatch)
-        self._mock_edit_openai(monkeypatch)
+        _mock_openai_client(monkeypatch)
         # Exhaust all allowed edits
         for _ in range(MAX_PROMPTS_GUEST):
             r = client.post(
@@ -658,7 +1448,7 @@ class TestGuestEditing:
 
     def test_guest_edit_returns_download_url_filename(self, monkeypatch):
         resume_id = self._generate_guest_resume(monkeypatch)
-        self._mock_edit_openai(monkeypatch)
+        _mock_openai_client(monkeypatch)
         resp = client.post(
             f"/api/resumes/{resume_id}/edit",
             data={"prompt": "Update the summary"},
@@ -693,7 +1483,7 @@ class TestGuestEditing:
         assert gen_resp.status_code == 200
         resume_id = gen_resp.json()["resume_id"]
 
-        self._mock_edit_openai(monkeypatch)
+        _mock_openai_client(monkeypatch)
         # Guest (no user_id) tries to edit a user-owned resume — must fail
         resp = client.post(
             f"/api/resumes/{resume_id}/edit",
@@ -702,7 +1492,7 @@ class TestGuestEditing:
         assert resp.status_code == 404  # not found (user_id IS NULL filter fails)
 
     def test_edit_nonexistent_resume_returns_404(self, monkeypatch):
-        self._mock_edit_openai(monkeypatch)
+        _mock_openai_client(monkeypatch)
         resp = client.post(
             "/api/resumes/999999/edit",
             data={"prompt": "Update"},
@@ -761,6 +1551,15 @@ class TestSwitchTemplate:
         assert "preview_html" in data
         assert data["template_id"] == "classic"
 
+    def test_resume_data_is_stored_as_compact_json(self, monkeypatch):
+        import orjson
+        from database import SessionLocal
+        from models import Resume
+        resume_id = self._guest_resume_id(monkeypatch)
+        with SessionLocal() as db:
+            stored = db.get(Resume, resume_id).resume_data
+        assert stored == orjson.dumps(orjson.loads(stored)).decode()
+
     def test_switch_template_updates_filename(self, monkeypatch):
         resume_id = self._guest_resume_id(monkeypatch)
         resp = client.post(
@@ -770,6 +1569,58 @@ class TestSwitchTemplate:
         assert resp.status_code == 200
         assert resp.json()["filename"].endswith(".docx")
 
+    def test_builder_version_change_rebuilds_document(self, monkeypatch):
+        import main
+        resume_data = {**MOCK_RESUME_JSON, "name": "Version Bump"}
+        first = main._write_resume_docx(resume_data, "classic")
+        assert main._write_resume_docx(resume_data, "classic") == first
+        monkeypatch.setattr("main.DOCX_BUILD_VERSION", main.DOCX_BUILD_VERSION + "-next")
+        rebuilt = main._write_resume_docx(resume_data, "classic")
+        assert rebuilt != first
+        assert rebuilt.exists()
+
+    def test_failed_build_leaves_no_temp_file(self, monkeypatch, tmp_path):
+        import main
+        monkeypatch.setattr("main.RESUMES_DIR", tmp_path)
+
+        def partial_build(output_path, *args, **kwargs):
+            Path(output_path).write_bytes(b"PK\x03\x04partial")
+            raise RuntimeError("builder crashed")
+
+        with patch("main.ResumeBuilder.build_word_document", side_effect=partial_build):
+            with pytest.raises(RuntimeError):
+                main._write_resume_docx({**MOCK_RESUME_JSON, "name": "Broken Build"}, "modern")
+        assert list(tmp_path.iterdir()) == []
+
+    def test_switching_back_reuses_the_same_document(self, monkeypatch):
+        resume_id = self._guest_resume_id(monkeypatch)
+        first = client.post(f"/api/resumes/{resume_id}/switch-template", data={"template_id": "classic"})
+        client.post(f"/api/resumes/{resume_id}/switch-template", data={"template_id": "minimal"})
+        with patch("main.ResumeBuilder.build_word_document") as mock_build:
+            again = client.post(f"/api/resumes/{resume_id}/switch-template", data={"template_id": "classic"})
+        assert again.json()["filename"] == first.json()["filename"]
+        mock_build.assert_not_called()
+
+    def test_deleting_one_resume_keeps_a_shared_document(self, monkeypatch):
+        first_id = self._guest_resume_id(monkeypatch)
+        second_id = self._guest_resume_id(monkeypatch)
+        filename = client.post(
+            f"/api/resumes/{first_id}/switch-template", data={"template_id": "creative"}
+        ).json()["filename"]
+        assert client.post(
+            f"/api/resumes/{second_id}/switch-template", data={"template_id": "creative"}
+        ).json()["filename"] == filename
+
+        assert client.delete(f"/api/resumes/{first_id}").status_code == 200
+        assert client.get(f"/api/resumes/download-file/{filename}").status_code == 200
+
+    def test_delete_removes_row_then_returns_404(self, monkeypatch):
+        resume_id = self._guest_resume_id(monkeypatch)
+        assert client.get(f"/api/resumes/{resume_id}/download").status_code == 200
+        assert client.delete(f"/api/resumes/{resume_id}").status_code == 200
+        assert client.get(f"/api/resumes/{resume_id}/download").status_code == 404
+        assert client.delete(f"/api/resumes/{resume_id}").status_code == 404
+
     def test_switch_template_all_four_templates(self, monkeypatch):
         resume_id = self._guest_resume_id(monkeypatch)
         for tid in ("modern", "classic", "creative", "minimal"):
@@ -318,6 +318,19 @@ class TestLegacyMethods:
         assert "Alice" in text
         assert "Dev" in text
 
+    def test_build_resume_text_layout(self, builder):
+        builder.collect_personal_info("Alice", {"email": "a@b.com", "phone": "0400", "location": "Sydney"})
+        builder.collect_experience([{"title": "Dev", "company": "Acme", "dates": "2020"}, "skip me"])
+        builder.collect_education([{"degree": "B.Sc.", "institution": "UNSW"}])
+        assert builder.build_resume_text() == (
+            "Alice\n"
+            "a@b.com | 0400 | Sydney\n\n"
+            "WORK EXPERIENCE\n"
+            "  Dev at Acme (2020)\n"
+            "\nEDUCATION\n"
+            "  B.Sc. from UNSW\n"
+        )
+
 
 # ── Template configuration tests ─────────────────────────────────────────────
 
@@ -439,6 +452,14 @@ class TestBuildWordDocumentWithTemplates:
         builder.build_word_document(tmp_docx, MINIMAL_CANDIDATE, template_id="nonexistent")
         assert Path(tmp_docx).exists()
 
+    def test_consecutive_builds_do_not_share_content(self, builder, tmp_path):
+        """Each build starts from a clean copy of the cached base document."""
+        first = str(tmp_path / "first.docx")
+        second = str(tmp_path / "second.docx")
+        builder.build_word_document(first, FULL_CANDIDATE, template_id="classic")
+        builder.build_word_document(second, MINIMAL_CANDIDATE, template_id="classic")
+        assert "JANE SMITH" not in _get_all_text(Document(second))
+
     def test_classic_uses_georgia_font(self, builder, tmp_path):
         path = str(tmp_path / "classic.docx")
         builder.build_word_document(path, FULL_CANDIDATE, template_id="classic")
@@ -27,6 +27,13 @@ class TestErrorHandling:
         resp = client.get(f"/api/resumes/download-file/{dangerous_name}")
         # Should either 404 (file doesn't exist) or sanitize the path
         assert resp.status_code in (400, 404)
+
+    def test_encoded_traversal_filename_rejected(self):
+        """Test that a traversal name reaching the handler is refused before any lookup"""
+        resp = client.get("/api/resumes/download-file/..%2F..%2Fetc%2Fpasswd")
+        assert resp.status_code in (400, 404)
+        resp = client.get("/api/resumes/download-file/.hidden.docx")
+        assert resp.status_code == 400
     
     def test_invalid_file_extension_rejected(self):
         """Test that invalid file extensions are rejected in upload"""
@@ -40,7 +47,7 @@ class TestErrorHandling:
     
     def test_file_too_large_rejected(self):
         """Test that files exceeding size limit are rejected"""
-        large_content = b"x" * (51 * 1024 * 1024)  # 51MB
+        large_content = b"%PDF-1.4\n" + b"x" * (51 * 1024 * 1024)  # 51MB
         fake_file = ("resume.pdf", io.BytesIO(large_content), "application/pdf")
         resp = client.post(
             "/api/upload-resume",
@@ -48,7 +55,46 @@ class TestErrorHandling:
         )
         assert resp.status_code == 413
         assert "too large" in resp.json()["detail"].lower()
-    
+
+    def test_file_too_large_leaves_no_partial_file(self):
+        """Test that a rejected oversize upload is removed from disk"""
+        from main import UPLOAD_DIR
+        large_content = b"%PDF-1.4\n" + b"x" * (51 * 1024 * 1024)  # 51MB
+        fake_file = ("oversize_partial.pdf", io.BytesIO(large_content), "application/pdf")
+        resp = client.post(
+            "/api/upload-resume",
+            files={"file": fake_file}
+        )
+        assert resp.status_code == 413
+        assert not (UPLOAD_DIR / "oversize_partial.pdf").exists()
+        assert not list(UPLOAD_DIR.glob(".*.part"))
+
+    def test_failed_upload_read_leaves_no_partial_file(self):
+        """Test that an error mid-upload removes the temp file"""
+        from starlette.datastructures import UploadFile
+        from main import UPLOAD_DIR
+        real_read = UploadFile.read
+        calls = []
+
+        async def failing_read(self, size=-1):
+            calls.append(size)
+            if len(calls) > 1:
+                raise OSError("connection reset")
+            return await real_read(self, size)
+
+        content = b"%PDF-1.4\n" + b"x" * (256 * 1024)
+        with patch.object(UploadFile, "read", failing_read):
+            resp = client.post("/api/upload-resume", files={"file": ("broken.pdf", io.BytesIO(content), "application/pdf")})
+        assert resp.status_code == 500
+        assert not list(UPLOAD_DIR.glob(".*.part"))
+
+    def test_mislabeled_file_content_rejected(self):
+        """Test that the extension must match the file's leading bytes"""
+        for name, content in (("resume.pdf", b"plain text"), ("resume.docx", b"%PDF-1.4\n"),
+                              ("resume.txt", b"PK\x03\x04binary")):
+            resp = client.post("/api/upload-resume", files={"file": (name, io.BytesIO(content), "application/octet-stream")})
+            assert resp.status_code == 415, name
+
     def test_missing_required_fields_returns_422(self):
         """Test that missing required fields return 422"""
         resp = client.post("/api/auth/signup", json={})
@@ -80,6 +126,18 @@ class TestDatabaseErrorHandling:
         result = handle_database_error(error, "test operation")
         assert result.status_code == 503
 
+    def test_get_db_rolls_back_and_closes_on_error(self):
+        """A handler exception rolls back the session before it is closed"""
+        import database
+        mock_session = MagicMock()
+        with patch.object(database, "SessionLocal", return_value=mock_session):
+            gen = database.get_db()
+            assert next(gen) is mock_session
+            with pytest.raises(ValueError):
+                gen.throw(ValueError("boom"))
+        mock_session.rollback.assert_called_once()
+        mock_session.close.assert_called_once()
+
 
 class TestPromptLimitEnforcement:
     def test_prompt_limit_check(self):
@@ -4,7 +4,7 @@ Tests for resume editing endpoints
 import pytest
 import json
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import io
 
 from main import app
@@ -35,7 +35,7 @@ class TestResumeEditing:
         # known error code.
         mock_response = MagicMock()
         mock_response.choices[0].message.content = json.dumps(MOCK_RESUME_DATA)
-        mock_openai.chat.completions.create.return_value = mock_response
+        mock_openai.chat.completions.create = AsyncMock(return_value=mock_response)
 
         resp = client.post(
             "/api/resumes/999/edit",
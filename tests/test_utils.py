@@ -3,8 +3,8 @@ Tests for utility functions in utils.py
 """
 import pytest
 from utils import (
-    sanitize_filename, validate_file_extension, get_max_prompts_for_tier,
-    validate_user_id, MAX_FILES,
+    content_matches_extension, sanitize_filename, slugify_filename_part, is_safe_filename, validate_file_extension, get_file_extension, get_max_prompts_for_tier, needs_enhancement,
+    validate_user_id, TTLCache, ORJSONResponse, BufferedFileResponse, MAX_FILES,
     MAX_PROMPTS_GUEST, MAX_PROMPTS_FREE, MAX_PROMPTS_PRO, MAX_PROMPTS_ENTERPRISE,
 )
 
@@ -28,6 +28,41 @@ class TestSanitizeFilename:
         assert sanitize_filename("") == "file"
         assert sanitize_filename(None) == "file"
 
+    def test_replaces_control_characters(self):
+        assert sanitize_filename("bad\x00name\n.txt") == "bad_name_.txt"
+
+
+class TestIsSafeFilename:
+    def test_accepts_generated_names(self):
+        assert is_safe_filename("resume_0a1b2c3d4e.docx")
+        assert is_safe_filename("resume_1234abcd_Jane_Doe.docx")
+
+    def test_rejects_traversal_and_separators(self):
+        assert not is_safe_filename("../secret.docx")
+        assert not is_safe_filename("..")
+        assert not is_safe_filename("a/b.docx")
+        assert not is_safe_filename("a\\b.docx")
+
+    def test_rejects_hidden_and_empty(self):
+        assert not is_safe_filename(".tmp.docx")
+        assert not is_safe_filename("")
+        assert not is_safe_filename(None)
+
+    def test_rejects_overlong(self):
+        assert not is_safe_filename("a" * 256)
+
+
+class TestSlugifyFilenamePart:
+    def test_collapses_unsafe_runs(self):
+        assert slugify_filename_part("Jane  O'Doe / CV") == "Jane_O_Doe_CV"
+
+    def test_truncates_to_max_length(self):
+        assert len(slugify_filename_part("a" * 300)) == 128
+
+    def test_handles_empty(self):
+        assert slugify_filename_part("") == ""
+        assert slugify_filename_part(None) == ""
+
 
 class TestValidateFileExtension:
     def test_allows_valid_extensions(self):
@@ -46,6 +81,61 @@ class TestValidateFileExtension:
         assert validate_file_extension("resume.DOCX")
 
 
+class TestGetFileExtension:
+    def test_returns_lowercased_suffix(self):
+        assert get_file_extension("Resume.PDF") == ".pdf"
+        assert get_file_extension("archive.tar.gz") == ".gz"
+
+    def test_no_extension_returns_empty(self):
+        assert get_file_extension("resume") == ""
+        assert get_file_extension(".bashrc") == ""
+        assert get_file_extension("") == ""
+        assert get_file_extension(None) == ""
+
+
+class TestContentMatchesExtension:
+    def test_accepts_matching_signatures(self):
+        assert content_matches_extension(b"%PDF-1.7\n%...", ".pdf")
+        assert content_matches_extension(b"PK\x03\x04\x14\x00", ".docx")
+        assert content_matches_extension(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1\x00", ".doc")
+        assert content_matches_extension(b"Jane Smith\nEngineer", ".txt")
+
+    def test_rejects_mislabeled_content(self):
+        assert not content_matches_extension(b"Jane Smith", ".pdf")
+        assert not content_matches_extension(b"%PDF-1.7", ".docx")
+        assert not content_matches_extension(b"PK\x03\x04", ".txt")
+
+    def test_rejects_binary_text(self):
+        assert not content_matches_extension(b"abc\x00def", ".txt")
+        assert not content_matches_extension(b"", ".pdf")
+
+
+POLISHED_SUMMARY = (
+    "Senior backend engineer with eight years of experience building payment and logistics "
+    "platforms in Python and Go. Led a team of six that shipped a real-time settlement "
+    "service processing two million transactions a day, and reduced infrastructure costs "
+    "by thirty percent through careful profiling and capacity planning across regions."
+)
+
+
+class TestNeedsEnhancement:
+    def test_empty_or_short_summary_needs_enhancement(self):
+        assert needs_enhancement("")
+        assert needs_enhancement(None)
+        assert needs_enhancement("Hard-working engineer who led projects.")
+
+    def test_polished_summary_is_kept(self):
+        assert not needs_enhancement(POLISHED_SUMMARY)
+
+    def test_summary_without_action_verbs_needs_enhancement(self):
+        bland = " ".join(["experienced professional with many skills"] * 10)
+        assert needs_enhancement(bland)
+
+    def test_placeholder_markers_need_enhancement(self):
+        assert needs_enhancement(POLISHED_SUMMARY + " TODO: add certifications.")
+        assert needs_enhancement(POLISHED_SUMMARY + " Currently at [Company].")
+
+
 class TestGetMaxPromptsForTier:
     def test_guest_tier(self):
         assert get_max_prompts_for_tier("guest") == MAX_PROMPTS_GUEST
@@ -81,3 +171,54 @@ class TestValidateUserId:
         assert not validate_user_id(-1)
         assert not validate_user_id("1")
         assert not validate_user_id(1.5)
+
+
+class TestTTLCache:
+    def test_returns_stored_value(self):
+        cache = TTLCache(maxsize=4, ttl=60)
+        cache.set("a", "value")
+        assert cache.get("a") == "value"
+
+    def test_missing_key_returns_none(self):
+        assert TTLCache().get("missing") is None
+
+    def test_expired_entry_returns_none(self):
+        cache = TTLCache(maxsize=4, ttl=0)
+        cache.set("a", "value")
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+
+class TestORJSONResponse:
+    def test_renders_json_bytes(self):
+        resp = ORJSONResponse({"name": "Alice", "skills": ["Python"], 1: "x"})
+        assert resp.body == b'{"name":"Alice","skills":["Python"],"1":"x"}'
+        assert resp.media_type == "application/json"
+
+
+class TestBufferedFileResponse:
+    def test_streams_file_in_large_chunks(self, tmp_path):
+        from starlette.applications import Starlette
+        from starlette.routing import Route
+        from starlette.testclient import TestClient
+
+        path = tmp_path / "big.bin"
+        content = bytes(range(256)) * 5000  # ~1.2 MiB
+        path.write_bytes(content)
+        app = Starlette(routes=[Route("/f", lambda request: BufferedFileResponse(path))])
+
+        assert BufferedFileResponse.chunk_size == 512 * 1024
+        resp = TestClient(app).get("/f")
+        assert resp.status_code == 200
+        assert resp.content == content
+        assert resp.headers["content-length"] == str(len(content))